@@ -0,0 +1,633 @@
+"""
+GitHub REST/GraphQL, GitLab v4 ve Discord webhook uç noktalarının yerel taklitleri.
+Gitty'nin kullandığı istekleri sentetik N repo ile cevaplar: sayfalama (Link,
+X-Total), ETag/304, rate limit başlıkları, ayarlanabilir gecikme ve hata enjeksiyonu
+(--error-rate ile 503, --slow-rate ile uzun kuyruk gecikmesi).
+
+    python bench/fake_servers.py --repos 1000 --latency 0.02
+
+GitHub, GitLab ve Discord ayrı portlarda çalışır (Gitty kota bucket'larını host
+başına tuttuğu için). Her sunucuda GET /_bench/stats ve POST /_bench/reset vardır.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote, urlencode
+
+from aiohttp import web
+
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+OWNER = "bench"
+
+
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeData:
+    """
+    Deterministik sentetik repolar. churn > 0 ise her churn_interval saniyede
+    repoların bu oranı değişir (yıldız, commit, yeni pipeline), böylece sıcak
+    döngüler de değişiklik yolunu çalıştırır. Her reponun updated_at'i farklıdır
+    ve değişen repolar en yeniye taşınır (artımlı keşif için).
+    """
+
+    def __init__(self, repos, churn=0.0, churn_interval=60):
+        self.repos = repos
+        self.churn_every = round(1 / churn) if churn > 0 else 0
+        self.churn_interval = churn_interval
+        self.started = time.time()
+        # Eski ad -> yeni ad: GraphQL eski adla sorulan repoyu yeni nameWithOwner ile döner
+        self.renames = {}
+
+    def epoch(self, i):
+        if not self.churn_every or i % self.churn_every:
+            return 0
+        return self.current_epoch()
+
+    def current_epoch(self):
+        if not self.churn_every:
+            return 0
+        return int((time.time() - self.started) // self.churn_interval)
+
+    def updated_at(self, i):
+        return iso(BASE_TIME + timedelta(days=self.epoch(i), seconds=-i))
+
+    def by_updated(self, after=None):
+        """updated_at'e göre yeniden eskiye repo indeksleri (after: sadece daha yeniler)"""
+        epoch = self.current_epoch()
+        if getattr(self, "_order_epoch", None) != epoch:
+            self._order = sorted(range(self.repos), key=self.updated_at, reverse=True)
+            self._order_epoch = epoch
+        if after is None:
+            return self._order
+        return [i for i in self._order if self.updated_at(i) > after]
+
+    def stats(self, i):
+        epoch = self.epoch(i)
+        return {
+            "stars": i % 50 + epoch,
+            "forks": i % 7,
+            "commits": 100 + i % 997 + epoch,
+            "open_issues": i % 13,
+            "closed_issues": i % 29 + 1,
+            "open_prs": i % 5,
+            "closed_prs": i % 11,
+            "updated_at": self.updated_at(i),
+        }
+
+    def pipelines(self, i):
+        """Her projede 3 pipeline; churn'de her dönem yeni bir tane"""
+        epoch = self.epoch(i)
+        return [
+            {
+                "id": i * 1000 + k,
+                "status": "success",
+                "ref": "main",
+                "sha": f"{k:040d}",
+                "created_at": iso(BASE_TIME + timedelta(minutes=k)),
+                "updated_at": iso(BASE_TIME + timedelta(minutes=k)),
+                "web_url": f"https://gitlab.example/{OWNER}/proj{i}/-/pipelines/{k}",
+            }
+            for k in range(1, 4 + epoch)
+        ]
+
+
+def _commit_range(rev_range):
+    """Sahte commit SHA'ları sıra numarasının hex'i: "a..b" -> b - a (b, a'nın devamıysa)"""
+    base, _, head = rev_range.partition("..")
+    return int(head.lstrip("."), 16) - int(base, 16)
+
+
+def _repo_index(name, prefix, data):
+    match = re.fullmatch(rf"{prefix}(\d+)", name)
+    if not match or int(match.group(1)) >= data.repos:
+        raise web.HTTPNotFound()
+    return int(match.group(1))
+
+
+class FakeServer:
+    """Ortak davranış: gecikme, istek sayaçları, ETag/304, kota başlıkları"""
+
+    def __init__(self, data, latency=0.0, jitter=0.5, rate_limit=1_000_000):
+        self.data = data
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.reset_at = int(time.time()) + 3600
+        self.remaining = {}
+        self.counts = {}
+        self.error_rate = self.slow_rate = 0.0
+        self.slow_latency = 0.0
+
+    def set_faults(self, error_rate=0.0, slow_rate=0.0, slow_latency=0.0):
+        """İsteklerin bir kısmına 503 ya da ek gecikme (p99 kuyruğu)"""
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/_bench/stats", self.handle_stats)
+        app.router.add_post("/_bench/reset", self.handle_reset)
+        self.routes(app.router)
+        return app
+
+    def routes(self, router):
+        raise NotImplementedError
+
+    def count(self, key, amount=1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def bucket(self, request):
+        return "core"
+
+    def quota_headers(self, bucket, remaining):
+        raise NotImplementedError
+
+    def exhausted(self, bucket):
+        raise NotImplementedError
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if request.path.startswith("/_bench/"):
+            return await handler(request)
+        if self.latency:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0, self.latency + random.uniform(-spread, spread)))
+        if self.slow_rate and random.random() < self.slow_rate:
+            self.count("slow")
+            await asyncio.sleep(self.slow_latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.count("503")
+            return web.json_response({"message": "Service Unavailable"}, status=503)
+
+        bucket = self.bucket(request)
+        remaining = self.remaining.get(bucket, self.rate_limit)
+        if remaining <= 0:
+            self.count("rate_limited")
+            return self.exhausted(bucket)
+        self.remaining[bucket] = remaining - 1
+
+        resp = await handler(request)
+        resp.headers.update(self.quota_headers(bucket, remaining - 1))
+        self.count("requests")
+        resource = request.match_info.route.resource
+        endpoint = request.get("endpoint") or (
+            resource.canonical if resource else request.path
+        )
+        self.count(f"{request.method} {endpoint}")
+        return resp
+
+    def json(self, request, data, headers=None):
+        body = json.dumps(data)
+        etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+        headers = {"ETag": etag, **(headers or {})}
+        if request.headers.get("If-None-Match") == etag:
+            self.count("304")
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=body, content_type="application/json", headers=headers)
+
+    def page(self, request, total, make_item, max_per_page=100):
+        """Sadece istenen sayfayı üretir; Link ve X-Total başlıklarıyla"""
+        per_page = min(int(request.query.get("per_page", 30)), max_per_page)
+        page = int(request.query.get("page", 1))
+        last = max(1, -(-total // per_page))
+        start = (page - 1) * per_page
+        items = [make_item(k) for k in range(start, min(total, start + per_page))]
+
+        links = []
+        # Ham yol: %2F içeren grup/proje yolları sonraki sayfada da korunur
+        path = request.raw_path.split("?", 1)[0]
+        base = f"{request.scheme}://{request.host}{path}"
+        query = dict(request.query)
+        if page < last:
+            links.append(
+                f'<{base}?{urlencode({**query, "page": page + 1})}>; rel="next"'
+            )
+            links.append(f'<{base}?{urlencode({**query, "page": last})}>; rel="last"')
+        headers = {
+            "X-Total": str(total),
+            "X-Total-Pages": str(last),
+            "X-Per-Page": str(per_page),
+        }
+        if page < last:
+            headers["X-Next-Page"] = str(page + 1)
+        if links:
+            headers["Link"] = ", ".join(links)
+        return items, headers
+
+    async def handle_stats(self, request):
+        return web.json_response(self.counts)
+
+    async def handle_reset(self, request):
+        self.counts = {}
+        return web.json_response({})
+
+
+class FakeGitHub(FakeServer):
+    def routes(self, router):
+        router.add_get("/user", self.handle_user)
+        router.add_get("/user/repos", self.handle_user_repos)
+        # Tüm kaynaklar aynı repoları döner; kaynaklar arası tekrar ayıklamayı çalıştırır
+        router.add_get("/users/{owner}/repos", self.handle_user_repos)
+        router.add_get("/orgs/{owner}/repos", self.handle_user_repos)
+        router.add_get("/repos/{owner}/{name}", self.handle_repo)
+        router.add_get("/repos/{owner}/{name}/{kind}", self.handle_list)
+        router.add_get("/repos/{owner}/{name}/compare/{basehead}", self.handle_compare)
+        router.add_post("/graphql", self.handle_graphql)
+
+    def bucket(self, request):
+        return "graphql" if request.path == "/graphql" else "core"
+
+    def quota_headers(self, bucket, remaining):
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Resource": bucket,
+        }
+
+    def exhausted(self, bucket):
+        return web.json_response(
+            {"message": "API rate limit exceeded"},
+            status=403,
+            headers=self.quota_headers(bucket, 0),
+        )
+
+    def repo_json(self, i):
+        stats = self.data.stats(i)
+        return {
+            "id": i,
+            "name": f"repo{i}",
+            "full_name": f"{OWNER}/repo{i}",
+            "owner": {"login": OWNER},
+            "stargazers_count": stats["stars"],
+            "forks_count": stats["forks"],
+            "default_branch": "main",
+            "archived": False,
+            "updated_at": stats["updated_at"],
+            "pushed_at": stats["updated_at"],
+        }
+
+    async def handle_user(self, request):
+        return self.json(request, {"login": OWNER})
+
+    async def handle_user_repos(self, request):
+        if request.query.get("sort") == "updated":
+            order = self.data.by_updated()
+            items, headers = self.page(
+                request, len(order), lambda k: self.repo_json(order[k])
+            )
+        else:
+            items, headers = self.page(request, self.data.repos, self.repo_json)
+        return self.json(request, items, headers)
+
+    async def handle_repo(self, request):
+        i = _repo_index(request.match_info["name"], "repo", self.data)
+        return self.json(request, self.repo_json(i))
+
+    async def handle_compare(self, request):
+        _repo_index(request.match_info["name"], "repo", self.data)
+        ahead = _commit_range(request.match_info["basehead"])
+        status = "ahead" if ahead > 0 else "identical" if ahead == 0 else "behind"
+        return self.json(
+            request,
+            {
+                "status": status,
+                "ahead_by": max(ahead, 0),
+                "behind_by": max(-ahead, 0),
+                "total_commits": max(ahead, 0),
+                "commits": [],
+                "files": [],
+            },
+        )
+
+    async def handle_list(self, request):
+        i = _repo_index(request.match_info["name"], "repo", self.data)
+        kind = request.match_info["kind"]
+        stats = self.data.stats(i)
+        state = request.query.get("state", "all")
+        if kind == "commits":
+            total = stats["commits"]
+            if request.query.get("sha"):
+                total = int(request.query["sha"], 16)
+        elif kind == "issues":
+            total = stats["open_issues"] + stats["closed_issues"]
+        elif kind == "pulls":
+            total = {
+                "open": stats["open_prs"],
+                "closed": stats["closed_prs"],
+            }.get(state, stats["open_prs"] + stats["closed_prs"])
+        else:
+            raise web.HTTPNotFound()
+
+        def item(k):
+            return {
+                "number": total - k,
+                "sha": f"{total - k:040x}",
+                "updated_at": stats["updated_at"],
+            }
+
+        items, headers = self.page(request, total, item)
+        return self.json(request, items, headers)
+
+    async def handle_graphql(self, request):
+        body = await request.json()
+        query, variables = body["query"], body.get("variables") or {}
+
+        if "$owner" in query:
+            stats = self.data.stats(_repo_index(variables["name"], "repo", self.data))
+            return web.json_response(
+                {
+                    "data": {
+                        "repository": {
+                            "openIssues": {"totalCount": stats["open_issues"]},
+                            "closedIssues": {"totalCount": stats["closed_issues"]},
+                        }
+                    }
+                }
+            )
+
+        data, errors = {}, []
+        for alias in re.findall(r"(r\d+): repository", query):
+            n = alias[1:]
+            name = self.data.renames.get(variables[f"n{n}"], variables[f"n{n}"])
+            try:
+                stats = self.data.stats(_repo_index(name, "repo", self.data))
+            except web.HTTPNotFound:
+                # Gerçek API gibi: bulunamayan repo null alias + NOT_FOUND, gerisi geçerli
+                data[alias] = None
+                errors.append(
+                    {
+                        "type": "NOT_FOUND",
+                        "path": [alias],
+                        "message": f"Could not resolve to a Repository "
+                        f"with the name '{variables[f'o{n}']}/{name}'.",
+                    }
+                )
+                continue
+            data[alias] = {
+                "nameWithOwner": f"{variables[f'o{n}']}/{name}",
+                "stargazerCount": stats["stars"],
+                "forkCount": stats["forks"],
+                "openIssues": {"totalCount": stats["open_issues"]},
+                "closedIssues": {"totalCount": stats["closed_issues"]},
+                "openPRs": {"totalCount": stats["open_prs"]},
+                "closedPRs": {"totalCount": stats["closed_prs"]},
+                "defaultBranchRef": {
+                    "target": {"history": {"totalCount": stats["commits"]}}
+                },
+            }
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        return web.json_response(body)
+
+
+class FakeGitLab(FakeServer):
+    def routes(self, router):
+        router.add_get("/api/v4/user", self.handle_user)
+        router.add_get("/api/v4/projects", self.handle_projects)
+        router.add_get("/api/v4/groups/{group}/projects", self.handle_projects)
+        router.add_get("/api/v4/users/{user}/projects", self.handle_projects)
+        # Proje yolu %2F ile kodlu; aiohttp çözülmüş yolda eşleştirdiği için ham yol okunur
+        router.add_get("/api/v4/projects/{rest:.+}", self.handle_project_path)
+
+    def quota_headers(self, bucket, remaining):
+        return {
+            "RateLimit-Limit": str(self.rate_limit),
+            "RateLimit-Remaining": str(remaining),
+            "RateLimit-Reset": str(self.reset_at),
+        }
+
+    def exhausted(self, bucket):
+        return web.json_response(
+            {"message": "429 Too Many Requests"},
+            status=429,
+            headers={
+                **self.quota_headers(bucket, 0),
+                "Retry-After": str(max(1, self.reset_at - int(time.time()))),
+            },
+        )
+
+    def parse_project_path(self, request):
+        """/api/v4/projects/bench%2Fproj7/issues -> (7, "issues")"""
+        rest = request.raw_path.split("?", 1)[0][len("/api/v4/projects/") :]
+        project, _, kind = rest.partition("/")
+        owner, _, name = unquote(project).partition("/")
+        if owner != OWNER:
+            raise web.HTTPNotFound()
+        request["endpoint"] = "/api/v4/projects/{id}" + (f"/{kind}" if kind else "")
+        return _repo_index(name, "proj", self.data), kind
+
+    def project_json(self, i):
+        stats = self.data.stats(i)
+        return {
+            "id": 100000 + i,
+            "path_with_namespace": f"{OWNER}/proj{i}",
+            "star_count": stats["stars"],
+            "forks_count": stats["forks"],
+            "default_branch": "main",
+            "last_activity_at": stats["updated_at"],
+        }
+
+    async def handle_user(self, request):
+        return self.json(request, {"id": 1, "username": OWNER})
+
+    async def handle_projects(self, request):
+        if request.query.get("order_by") == "last_activity_at":
+            order = self.data.by_updated(request.query.get("last_activity_after"))
+            items, headers = self.page(
+                request, len(order), lambda k: self.project_json(order[k])
+            )
+        else:
+            items, headers = self.page(request, self.data.repos, self.project_json)
+        return self.json(request, items, headers)
+
+    async def handle_project_path(self, request):
+        i, kind = self.parse_project_path(request)
+        if kind:
+            return await self.handle_project_list(request, i, kind)
+        project = self.project_json(i)
+        if request.query.get("statistics") == "true":
+            project["statistics"] = {"commit_count": self.data.stats(i)["commits"]}
+        return self.json(request, project)
+
+    async def handle_project_list(self, request, i, kind):
+        stats = self.data.stats(i)
+
+        if kind == "issues_statistics":
+            opened, closed = stats["open_issues"], stats["closed_issues"]
+            counts = {"all": opened + closed, "opened": opened, "closed": closed}
+            return self.json(request, {"statistics": {"counts": counts}})
+
+        if kind == "pipelines":
+            pipelines = self.data.pipelines(i)
+            updated_after = request.query.get("updated_after")
+            if updated_after:
+                pipelines = [p for p in pipelines if p["updated_at"] > updated_after]
+                pipelines.sort(key=lambda p: p["updated_at"])
+            else:
+                pipelines.sort(key=lambda p: -p["id"])
+            items, headers = self.page(request, len(pipelines), lambda k: pipelines[k])
+            return self.json(request, items, headers)
+
+        state = request.query.get("state")
+        if kind == "repository/commits":
+            total = stats["commits"]
+            rev_range = request.query.get("ref_name", "")
+            if ".." in rev_range:
+                total = max(_commit_range(rev_range), 0)
+            elif rev_range:
+                total = int(rev_range, 16)
+        elif kind == "issues":
+            total = stats["open_issues"] + stats["closed_issues"]
+        elif kind == "merge_requests":
+            # Kapalı MR'ların yarısı merged sayılır
+            merged = stats["closed_prs"] // 2
+            total = {
+                "opened": stats["open_prs"],
+                "merged": merged,
+                "closed": stats["closed_prs"] - merged,
+            }.get(state, stats["open_prs"] + stats["closed_prs"])
+        else:
+            raise web.HTTPNotFound()
+
+        def item(k):
+            sha = f"{total - k:040x}"
+            return {
+                # Commit nesnelerinde id SHA'dır
+                "id": sha if kind == "repository/commits" else total - k,
+                "iid": total - k,
+                "sha": sha,
+                "updated_at": stats["updated_at"],
+            }
+
+        items, headers = self.page(request, total, item)
+        return self.json(request, items, headers)
+
+
+class FakeDiscord(FakeServer):
+    """Webhook başına pencere: window saniyede limit mesaj, fazlası 429 + retry_after"""
+
+    def __init__(self, data, latency=0.0, jitter=0.5, limit=5, window=2.0):
+        super().__init__(data, latency, jitter)
+        self.limit = limit
+        self.window = window
+        self.windows = {}
+
+    def routes(self, router):
+        router.add_post("/api/webhooks/{id}/{token}", self.handle_webhook)
+
+    def quota_headers(self, bucket, remaining):
+        return {}
+
+    async def handle_webhook(self, request):
+        payload = await request.json()
+        hook = request.match_info["id"]
+        now = time.monotonic()
+        started, used = self.windows.get(hook, (now, 0))
+        if now - started >= self.window:
+            started, used = now, 0
+        reset_after = self.window - (now - started)
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": f"bench-{hook}",
+        }
+        if used >= self.limit:
+            self.count("discord_429")
+            return web.json_response(
+                {
+                    "message": "You are being rate limited.",
+                    "retry_after": reset_after,
+                    "global": False,
+                },
+                status=429,
+                headers={**headers, "X-RateLimit-Remaining": "0"},
+            )
+        self.windows[hook] = (started, used + 1)
+        self.count("discord_messages")
+        self.count("discord_embeds", len(payload.get("embeds") or []))
+        headers["X-RateLimit-Remaining"] = str(self.limit - used - 1)
+        return web.Response(status=204, headers=headers)
+
+
+def build_servers(args):
+    data = FakeData(args.repos, args.churn, args.churn_interval)
+    github = FakeGitHub(data, args.latency, args.jitter, args.rate_limit)
+    gitlab = FakeGitLab(data, args.latency, args.jitter, args.rate_limit)
+    for server in (github, gitlab):
+        server.set_faults(args.error_rate, args.slow_rate, args.slow_latency)
+    return (
+        github,
+        gitlab,
+        FakeDiscord(
+            data, args.latency, args.jitter, args.discord_limit, args.discord_window
+        ),
+    )
+
+
+def add_arguments(parser):
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=18080, help="GitHub; GitLab +1, Discord +2"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds per request"
+    )
+    parser.add_argument("--jitter", type=float, default=0.5, help="± share of latency")
+    parser.add_argument(
+        "--rate-limit", type=int, default=1_000_000, help="calls per hour"
+    )
+    parser.add_argument(
+        "--churn", type=float, default=0.0, help="share of repos changing"
+    )
+    parser.add_argument("--churn-interval", type=float, default=60)
+    parser.add_argument("--discord-limit", type=int, default=5)
+    parser.add_argument("--discord-window", type=float, default=2.0)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of API calls → 503"
+    )
+    parser.add_argument(
+        "--slow-rate", type=float, default=0.0, help="share of API calls delayed"
+    )
+    parser.add_argument(
+        "--slow-latency", type=float, default=2.0, help="extra seconds when delayed"
+    )
+
+
+async def serve(args):
+    runners = []
+    for offset, server in enumerate(build_servers(args)):
+        runner = web.AppRunner(server.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port + offset).start()
+        runners.append(runner)
+    print(
+        f"fake servers: github :{args.port}, gitlab :{args.port + 1}, "
+        f"discord :{args.port + 2} ({args.repos} repos)",
+        flush=True,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
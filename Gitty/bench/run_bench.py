@@ -0,0 +1,316 @@
+"""
+Gitty çevrimdışı benchmark'ı: yerel sahte GitHub/GitLab/Discord sunucularına karşı
+sync_github_data, sync_gitlab_data ve run_sync_loop'u farklı repo sayılarında çalıştırır.
+
+    python bench/run_bench.py --repos 100 1000 10000
+    python bench/run_bench.py --repos 1000 --targets loop --cycles 3 --churn 0.05
+    python bench/run_bench.py --repos 1000 --error-rate 0.02 --slow-rate 0.01
+
+Her (repo sayısı, hedef) çifti temiz bir DB ile ayrı süreçte koşar; döngü süreleri,
+istek sayıları, tepe RSS ve DB yazım hızı raporlanır.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+TARGETS = ("github", "gitlab", "loop")
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def _histogram_totals(metric):
+    """Tüm etiketler üzerinden (gözlem sayısı, toplam süre)"""
+    count = total = 0
+    for _, (counts, value_sum) in metric.items():
+        count += sum(counts)
+        total += value_sum
+    return count, total
+
+
+def _counter_total(metric, **match):
+    return sum(
+        value
+        for labels, value in metric.items()
+        if all(labels.get(k) == str(v) for k, v in match.items())
+    )
+
+
+async def _run_loop(cycles):
+    """run_sync_loop'u istenen döngü sayısı tamamlanana kadar çalıştırır"""
+    import main as gitty
+    from services.http_client import HttpClient
+    from services.outbox import outbox
+    from services.telemetry import CYCLE_SECONDS
+    from services.webhook import notifier
+
+    durations, seen_count, seen_sum = [], 0, 0.0
+    await notifier.start()
+    outbox_task = asyncio.create_task(outbox.run())
+    try:
+        async with HttpClient() as http:
+            loop_task = asyncio.create_task(gitty.run_sync_loop(http))
+            try:
+                while len(durations) < cycles:
+                    await asyncio.sleep(0.05)
+                    if loop_task.done():
+                        loop_task.result()
+                        break
+                    count, total = _histogram_totals(CYCLE_SECONDS)
+                    if count > seen_count:
+                        durations.append(total - seen_sum)
+                        seen_count, seen_sum = count, total
+            finally:
+                loop_task.cancel()
+    finally:
+        outbox_task.cancel()
+        await notifier.close()
+    return durations
+
+
+def child_main(args):
+    """Tek hedefi bu süreçte çalıştırır, sonucu tek JSON satırı olarak yazar"""
+    sys.path.insert(0, str(SRC_DIR))
+    from services import telemetry
+    from services.db_create import create_database
+    from services.db_writer import writer
+
+    create_database()
+    if args.child == "loop":
+        durations = asyncio.run(_run_loop(args.cycles))
+    else:
+        from services.github_sync import sync_github_data
+        from services.gitlab_sync import sync_gitlab_data
+
+        run = sync_github_data if args.child == "github" else sync_gitlab_data
+        durations = []
+        for _ in range(args.cycles):
+            started = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - started)
+    writer.flush()
+
+    rows = _counter_total(telemetry.DB_ROWS)
+    _, write_seconds = _histogram_totals(telemetry.DB_WRITE_SECONDS)
+    _, commit_seconds = _histogram_totals(telemetry.DB_COMMIT_SECONDS)
+    result = {
+        "cycles": [round(d, 3) for d in durations],
+        "client_requests": _counter_total(telemetry.HTTP_REQUESTS),
+        "client_errors": _counter_total(telemetry.HTTP_REQUESTS, status="error"),
+        "client_retries": _counter_total(telemetry.HTTP_RETRIES),
+        "client_hedges": _counter_total(telemetry.HTTP_HEDGES, result="sent"),
+        "db_rows": rows,
+        "db_busy_seconds": round(write_seconds + commit_seconds, 3),
+        "db_rows_per_second": round(rows / (write_seconds + commit_seconds or 1e-9)),
+        # Linux'ta ru_maxrss KB cinsinden
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def _url(port, path):
+    return f"http://127.0.0.1:{port}{path}"
+
+
+def _call(port, path, method="GET"):
+    req = urllib.request.Request(_url(port, path), method=method)
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+def start_fakes(args, repos):
+    cmd = [
+        sys.executable,
+        str(BENCH_DIR / "fake_servers.py"),
+        "--repos",
+        str(repos),
+        "--port",
+        str(args.port),
+        "--latency",
+        str(args.latency),
+        "--rate-limit",
+        str(args.rate_limit),
+        "--churn",
+        str(args.churn),
+        "--churn-interval",
+        str(args.churn_interval),
+        "--discord-limit",
+        str(args.discord_limit),
+        "--discord-window",
+        str(args.discord_window),
+        "--error-rate",
+        str(args.error_rate),
+        "--slow-rate",
+        str(args.slow_rate),
+        "--slow-latency",
+        str(args.slow_latency),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            for offset in range(3):
+                _call(args.port + offset, "/_bench/stats")
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake servers did not start")
+
+
+def child_env(args, db_dir):
+    github, gitlab, discord = args.port, args.port + 1, args.port + 2
+    env = dict(os.environ)
+    env.update(
+        {
+            "DB_DIR": db_dir,
+            "GITHUB_TOKEN": "bench",
+            "GITLAB_TOKEN": "bench",
+            "GITHUB_API_URL": _url(github, ""),
+            "GITHUB_GRAPHQL_URL": _url(github, "/graphql"),
+            "GITHUB_SYNC_MODE": args.github_mode,
+            "GITLAB_URL": _url(gitlab, ""),
+            "WEBHOOK_STATS": _url(discord, "/api/webhooks/1/bench"),
+            "WEBHOOK_UPDATES": _url(discord, "/api/webhooks/2/bench"),
+            "WEBHOOK_PIPELINES": _url(discord, "/api/webhooks/3/bench"),
+            # Döngü modunda ikinci tur hemen vadeli olsun
+            "GITTY_POLL_MIN": "1",
+            "GITTY_RECEIVER_PORT": "0",
+            "GITTY_TELEMETRY_PORT": "0",
+        }
+    )
+    return env
+
+
+def run_target(args, repos, target):
+    for offset in range(3):
+        _call(args.port + offset, "/_bench/reset", "POST")
+    with tempfile.TemporaryDirectory(prefix="gitty-bench-") as db_dir:
+        cmd = [
+            sys.executable,
+            str(Path(__file__).resolve()),
+            "--child",
+            target,
+            "--cycles",
+            str(args.cycles),
+        ]
+        started = time.perf_counter()
+        proc = subprocess.run(
+            cmd,
+            env=child_env(args, db_dir),
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            timeout=args.timeout,
+            check=False,
+        )
+        wall = time.perf_counter() - started
+
+    lines = [
+        line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)
+    ]
+    if proc.returncode or not lines:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+        raise RuntimeError(f"{target} @ {repos} failed:\n" + "\n".join(tail))
+
+    result = json.loads(lines[-1][len(RESULT_PREFIX) :])
+    github, gitlab, discord = (
+        _call(args.port + offset, "/_bench/stats") for offset in range(3)
+    )
+    result.update(
+        {
+            "repos": repos,
+            "target": target,
+            "process_seconds": round(wall, 3),
+            "server_requests": github.get("requests", 0) + gitlab.get("requests", 0),
+            "not_modified": github.get("304", 0) + gitlab.get("304", 0),
+            "rate_limited": github.get("rate_limited", 0)
+            + gitlab.get("rate_limited", 0),
+            "discord_messages": discord.get("discord_messages", 0),
+            "discord_embeds": discord.get("discord_embeds", 0),
+            "discord_429": discord.get("discord_429", 0),
+            "endpoints": {
+                name: {k: v for k, v in stats.items() if " " in k}
+                for name, stats in (("github", github), ("gitlab", gitlab))
+            },
+        }
+    )
+    return result
+
+
+def print_table(results):
+    header = (
+        f"{'repos':>6} {'target':<7} {'cycles (s)':<24} {'requests':>9} "
+        f"{'304':>7} {'req/s':>7} {'rss MB':>7} {'db rows':>8} {'rows/s':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        busy = sum(r["cycles"]) or 1e-9
+        cycles = " / ".join(f"{c:.2f}" for c in r["cycles"])
+        print(
+            f"{r['repos']:>6} {r['target']:<7} {cycles:<24} {r['server_requests']:>9} "
+            f"{r['not_modified']:>7} {r['server_requests'] / busy:>7.0f} "
+            f"{r['peak_rss_mb']:>7} {r['db_rows']:>8} {r['db_rows_per_second']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repos", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument(
+        "--cycles", type=int, default=2, help="first is cold, the rest hit ETags"
+    )
+    parser.add_argument("--github-mode", choices=("rest", "graphql"), default="rest")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--rate-limit", type=int, default=1_000_000)
+    parser.add_argument("--churn", type=float, default=0.0)
+    parser.add_argument("--churn-interval", type=float, default=5)
+    parser.add_argument("--discord-limit", type=int, default=5)
+    parser.add_argument("--discord-window", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--json", help="write full results (incl. per-endpoint counts)")
+    parser.add_argument("--child", choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args)
+        return
+
+    results = []
+    for repos in args.repos:
+        fakes = start_fakes(args, repos)
+        try:
+            for target in args.targets:
+                print(f"▶ {target} @ {repos} repos...", flush=True)
+                results.append(run_target(args, repos, target))
+        finally:
+            fakes.terminate()
+            fakes.wait()
+
+    print()
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
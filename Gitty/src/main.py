@@ -1,20 +1,57 @@
 import asyncio
 import os
 import sqlite3
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
+from services.change_log import (
+    advance_cursor,
+    changed_repo_ids,
+    last_change_id,
+    load_changes,
+    load_cursor,
+    rebuild_old_stats,
+)
+from services.checkpoints import (
+    checked_since,
+    is_resume,
+    load_checkpoints,
+    rate_limit_checkpoint,
+    save_checkpoint,
+)
 from services.db_create import DB_PATH, create_database
-from services.github_sync import sync_github_data
-from services.gitlab_sync import sync_gitlab_data
+from services.db_writer import writer
+from services.github_sync import sync_github
+from services.gitlab_sync import mark_forced_pushes, sync_gitlab
+from services.http_client import HttpClient
+from services.outbox import enqueue, outbox
+from services.scheduler import (
+    DISCOVERY_INTERVAL,
+    POLL_MAX,
+    SYNC_FRESHNESS,
+    PollScheduler,
+)
+from services.sharding import SHARD_COUNT, ShardLease
+from services.telemetry import CYCLE_SECONDS, TELEMETRY_PORT, TelemetryServer
+from services.timeseries import ROLLUP_INTERVAL, record_changes, rollup, trend_line
 from services.webhook import notifier
+from services.webhook_receiver import (
+    RECEIVER_PORT,
+    RECONCILE_INTERVAL,
+    WebhookReceiver,
+    apply_events,
+)
 
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(os.path.join(BASE_DIR, ".env"))
 
+# Platform başına senkron süresi sınırı; aşılırsa o platform iptal edilir
+SYNC_TIMEOUT = float(os.getenv("GITTY_SYNC_TIMEOUT", "1800"))
 
-def get_current_stats():
-    """Repositories ve Repo_Stats tablolarından tüm verileri al"""
+
+def get_current_stats(repo_ids=None):
+    """Repositories ve Repo_Stats tablolarından verileri al (repo_ids: sadece bu repolar)"""
     stats = {}
     if not os.path.exists(DB_PATH):
         print("❌ DB yok!")
@@ -25,11 +62,20 @@ def get_current_stats():
     cursor = conn.cursor()
 
     try:
-        # Önce tüm repoları al
-        cursor.execute("""
-            SELECT id, platform, repo_name, star_count, fork_count
-            FROM Repositories
-        """)
+        # Önce repoları al
+        if repo_ids is None:
+            cursor.execute("""
+                SELECT id, platform, repo_name, star_count, fork_count
+                FROM Repositories WHERE active = 1
+            """)
+        else:
+            cursor.execute(
+                f"""
+                SELECT id, platform, repo_name, star_count, fork_count
+                FROM Repositories WHERE id IN ({",".join("?" * len(repo_ids))})
+            """,
+                list(repo_ids),
+            )
         repos = cursor.fetchall()
 
         # Her repo için temel verileri ekle
@@ -38,8 +84,9 @@ def get_current_stats():
             key = f"{repo['platform']}_{repo['repo_name']}"
             repo_map[repo["id"]] = key
             stats[key] = {
-                "stars": int(repo["star_count"]),
-                "forks": int(repo["fork_count"]),
+                "id": repo["id"],
+                "stars": int(repo["star_count"] or 0),
+                "forks": int(repo["fork_count"] or 0),
                 "commits": 0,
                 "open_issues": 0,
                 "closed_issues": 0,
@@ -114,117 +161,270 @@ def compare_stats(old, new):
     return changes
 
 
-async def send_with_delay(notifier_func, delay=1.0):
-    """Webhook mesajını gönder ve belirtilen süre bekle (rate limit koruması)"""
-    result = await notifier_func
-    await asyncio.sleep(delay)
-    return result
+async def run_platform(name, coro, timeout=SYNC_TIMEOUT):
+    """Tek platform senkronu; hata ve zaman aşımı diğer platformu etkilemez"""
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        print(f"  ⚠️ {name} Sync zaman aşımı ({timeout:g}s), iptal edildi")
+    except Exception as e:
+        print(f"  ⚠️ {name} Sync hatası (devam ediliyor): {e}")
+    return None
+
+
+async def sync_platforms(http, repo_ids, discover):
+    """
+    GitHub ve GitLab aynı event loop'ta birlikte senkronlanır (kotaları ayrı);
+    döngü süresi yavaş olan platform kadardır. Pipeline geçişlerini döner.
+    """
+    print("  ⚙️ GitHub + GitLab senkronizasyonu (paralel)...")
+    # Writer her batch'i hemen commit eder; çökmede biten repolar tekrar çekilmez
+    _, transitions = await asyncio.gather(
+        run_platform("GitHub", sync_github(http, repo_ids=repo_ids, discover=discover)),
+        run_platform("GitLab", sync_gitlab(http, repo_ids=repo_ids, discover=discover)),
+    )
+    http.rate_limits.log_budget("  ")
+    return transitions or []
+
+
+async def notify_changes(changes, pipeline_transitions):
+    """Change_Log'daki değişiklikleri ve pipeline geçişlerini outbox'a yazar"""
+    notification_count = 0
+    # Sadece değişen repoların güncel verileri okunur
+    current = get_current_stats(list(changes)) if changes else {}
+
+    # Yeni eklenen repolar
+    for repo_key, data in current.items():
+        if changes[data["id"]]["added"]:
+            platform, repo_name = repo_key.split("_", 1)
+
+            # Yeni repo mesajı oluştur
+            msg = f"**{repo_name}** ({platform.upper()})\n"
+            msg += f"🌟 {data['stars']} yıldız, 🍴 {data['forks']} fork"
+
+            if data["commits"] > 0:
+                msg += f"\n📝 {data['commits']} commit"
+            if data["open_issues"] > 0 or data["closed_issues"] > 0:
+                msg += f"\n🐛 {data['open_issues']} açık / ✅ {data['closed_issues']} kapalı issue"
+            if data["open_prs"] > 0 or data["closed_prs"] > 0:
+                msg += (
+                    f"\n🔀 {data['open_prs']} açık / 🔀 {data['closed_prs']} kapalı PR"
+                )
 
+            enqueue(
+                category="stats",
+                title="🆕 Yeni Repo Takibe Alındı",
+                description=msg,
+                color=0x2ECC71,  # Yeşil
+            )
+            notification_count += 1
+            print(f"  📨 Yeni repo bildirimi: {repo_name}")
+
+    # Varolan repolardaki değişiklikler
+    for repo_key, new in current.items():
+        entry = changes[new["id"]]
+        if entry["added"]:
+            continue
+        old = rebuild_old_stats(new, entry["fields"])
+
+        repo_changes = compare_stats(old, new)
+
+        if repo_changes:
+            platform, repo_name = repo_key.split("_", 1)
+            msg = f"**{repo_name}** ({platform.upper()})\n" + "\n".join(repo_changes)
+            # Repo_Metrics geçmişinden kısa trend
+            trend = trend_line(new["id"], entry["fields"])
+            if trend:
+                msg += f"\n{trend}"
+
+            enqueue(
+                category="stats",
+                title="📊 Repo Güncellemesi",
+                description=msg,
+                color=0x3498DB,  # Mavi
+            )
+            notification_count += 1
+            print(
+                f"  📨 Güncelleme bildirimi: {repo_name} ({len(repo_changes)} değişiklik)"
+            )
 
-async def run_sync_loop():
-    print("🚀 Gitty Active! Parallel check starting every 1000 seconds...")
+    # Pipeline geçişleri outbox'a durumla aynı transaction'da yazıldı
+    # (enqueue_pipeline_transition); burada sadece sayılır
+    for transition in pipeline_transitions:
+        notification_count += 1
+        print(
+            f"  📨 Pipeline bildirimi: {transition['repo_name']} #{transition['pipeline_id']}"
+        )
+
+    if notification_count == 0:
+        print("  ℹ️ Değişiklik yok, bildirim gönderilmedi.")
+    else:
+        print(f"  ✅ {notification_count} bildirim gönderim kuyruğuna alındı.")
+    return notification_count
+
+
+async def process_changes(pipeline_transitions, lease=None, since_id=0):
+    """
+    İmleçten sonraki değişiklikleri bildirir; değişen repo id'lerini döner.
+    Outbox kayıtları ve imleç aynı transaction'da commit edilir:
+    çökme olursa ya ikisi birden yazılmıştır ya hiçbiri.
+    Çok worker'lı modda Change_Log'u sadece lider tüketir; diğerleri kendi
+    pipeline geçişlerini kuyruğa alır ve since_id'den sonraki değişikliklere bakar.
+    """
+    if lease is not None and not lease.is_leader:
+        await notify_changes({}, pipeline_transitions)
+        await asyncio.to_thread(writer.flush)
+        changed = await asyncio.to_thread(changed_repo_ids, since_id)
+        return changed | {t["repo_id"] for t in pipeline_transitions}
+
+    cursor = await asyncio.to_thread(load_cursor)
+    changes, last_id = await asyncio.to_thread(load_changes, cursor)
+    count = await notify_changes(changes, pipeline_transitions)
+    # Trend sorguları için farklar zaman serisine de yazılır
+    record_changes(changes)
+    if last_id != cursor:
+        advance_cursor(last_id)
+    await asyncio.to_thread(writer.flush)
+    if count:
+        outbox.wake()
+    return set(changes) | {t["repo_id"] for t in pipeline_transitions}
+
+
+async def handle_webhook_events(http, events, scheduler, lease=None):
+    """Webhook olaylarını uygular ve farkları aynı bildirim yolundan gönderir"""
+    print(f"📡 {len(events)} webhook olayı uygulanıyor...")
+    # GitLab push'ları force push bayrağı taşımaz: ata kontrolü API ile yapılır
+    await mark_forced_pushes(http, events)
+    since_id = await asyncio.to_thread(last_change_id)
+    transitions, resync_ids = await asyncio.to_thread(apply_events, events)
+    await process_changes(transitions, lease, since_id)
+    # Delta ile kesin uygulanamayan olaylar (force push vb.) için hemen yeniden say
+    for repo_id in resync_ids:
+        if repo_id in scheduler:
+            scheduler.wake(repo_id)
+
+
+async def wait_for_next_cycle(
+    http, scheduler, next_discovery, receiver=None, lease=None
+):
+    """Bir sonraki vadeye kadar bekler; alıcı açıksa gelen olayları arada işler"""
+    wake_at = min(scheduler.next_wakeup() or next_discovery, next_discovery)
+    wait = max(5, min(POLL_MAX, wake_at - time.time()))
+    if lease is not None:
+        # Shard aralığı değişirse devralınan repolar geç kalmasın
+        wait = min(wait, max(5, lease.interval))
+    print(f"😴 {wait:.0f} saniye bekleniyor... ({wait / 60:.1f} dakika)")
+    if receiver is None:
+        await asyncio.sleep(wait)
+        return
+
+    deadline = time.time() + wait
+    while (remaining := deadline - time.time()) > 0:
+        events = await receiver.next_batch(remaining)
+        if events:
+            await handle_webhook_events(http, events, scheduler, lease)
+            # Yeniden sayım istenen repo varsa bekleme kısalır
+            deadline = min(deadline, scheduler.next_wakeup() or deadline)
+
+
+async def run_sync_loop(http, receiver=None, lease=None, checkpoints=None):
+    print(
+        "🚀 Gitty Active! Repolar değişim hızına göre planlanarak kontrol ediliyor..."
+    )
     print(
         "📊 Tüm repo istatistikleri (yıldız, fork, commit, issue, PR) takip ediliyor..."
     )
-    print("⏱️  Rate limit koruması: Her mesajdan sonra 1 saniye beklenecek")
+    print(
+        "⏱️  Bildirimler outbox'tan mesaj başına 10 embed'e kadar paketlenerek gönderilir"
+    )
 
-    # İlk çalıştırmada mevcut verileri göster
-    initial_stats = get_current_stats()
-    print(f"📈 Başlangıçta {len(initial_stats)} repo takip ediliyor.")
+    # Webhook'lar açıkken polling sadece seyrek mutabakat taramasıdır
+    owns = lease.owns if lease is not None else None
+    if receiver is not None:
+        scheduler = PollScheduler(
+            min_interval=RECONCILE_INTERVAL,
+            max_interval=max(POLL_MAX, RECONCILE_INTERVAL),
+            owns=owns,
+        )
+    else:
+        scheduler = PollScheduler(owns=owns)
+    # Sıcak başlangıç: aşama zamanları ve kota durumu son checkpoint'lerden
+    if checkpoints is None:
+        checkpoints = await asyncio.to_thread(load_checkpoints)
+    next_discovery = checkpoints.get("next_discovery", (0, 0))[0]
+    next_rollup = checkpoints.get("next_rollup", (0, 0))[0]
+    rate_limits = checkpoints.get(rate_limit_checkpoint())
+    if rate_limits:
+        http.rate_limits.restore(rate_limits[0])
+    cycle = checkpoints.get("cycle")
+    if cycle and cycle[0]["stage"] != "done":
+        print(
+            f"♻️ Önceki döngü '{cycle[0]['stage']}' aşamasında yarıda kalmış; "
+            f"son {SYNC_FRESHNESS}s içinde kontrol edilen repolar atlanıyor."
+        )
+    print(f"📈 Başlangıçta {scheduler.load()} repo takip ediliyor.")
 
     while True:
         try:
-            # 1. Güncelleme öncesi veriler
-            old_stats = get_current_stats()
-            print(f"🔄 Güncelleme başlıyor... ({len(old_stats)} repo)")
+            cycle_started = time.monotonic()
+            leader = lease is None or lease.is_leader
+            # 1. Repo listesi seyrek yenilenir; yeni repolar hemen vadeli planlanır.
+            # Çok worker'lı modda listeyi lider yeniler, diğerleri load() ile görür
+            if leader and time.time() >= next_discovery:
+                save_checkpoint("cycle", {"stage": "discovery"})
+                print(f"🔍 Repo listesi yenileniyor... ({len(scheduler)} repo)")
+                await sync_platforms(http, repo_ids=[], discover=True)
+                next_discovery = time.time() + DISCOVERY_INTERVAL
+                save_checkpoint("next_discovery", next_discovery)
+            scheduler.load()
+
+            # Sadece vadesi gelen repoların istatistikleri çekilir
+            due = set(scheduler.due())
+            since_id = await asyncio.to_thread(last_change_id) if not leader else 0
+            pipeline_transitions = []
+            sync_started = int(time.time())
+            if due:
+                if leader:
+                    save_checkpoint("cycle", {"stage": "stats"})
+                print(f"🔄 Güncelleme başlıyor... ({len(due)}/{len(scheduler)} repo)")
+                pipeline_transitions = await sync_platforms(
+                    http, repo_ids=due, discover=False
+                )
 
-            # 2. GitHub ve GitLab'dan verileri çek
-            print("  ⚙️ GitHub senkronizasyonu...")
-            try:
-                await asyncio.to_thread(sync_github_data)
-            except Exception as e:
-                print(f"  ⚠️ GitHub Sync hatası (devam ediliyor): {e}")
+            print(f"✅ Güncelleme tamamlandı. ({len(due)} repo)")
 
-            print("  ⚙️ GitLab senkronizasyonu...")
-            try:
-                await asyncio.to_thread(sync_gitlab_data)
-            except Exception as e:
-                print(f"  ⚠️ GitLab Sync hatası (devam ediliyor): {e}")
-
-            # 3. Güncelleme sonrası veriler
-            new_stats = get_current_stats()
-            print(f"✅ Güncelleme tamamlandı. ({len(new_stats)} repo)")
-
-            # 4. Değişiklikleri kontrol et ve bildirim gönder
-            notification_count = 0
-
-            # Yeni eklenen repolar
-            for repo_key in new_stats:
-                if repo_key not in old_stats:
-                    platform, repo_name = repo_key.split("_", 1)
-                    data = new_stats[repo_key]
-
-                    # Yeni repo mesajı oluştur
-                    msg = f"**{repo_name}** ({platform.upper()})\n"
-                    msg += f"🌟 {data['stars']} yıldız, 🍴 {data['forks']} fork"
-
-                    if data["commits"] > 0:
-                        msg += f"\n📝 {data['commits']} commit"
-                    if data["open_issues"] > 0 or data["closed_issues"] > 0:
-                        msg += f"\n🐛 {data['open_issues']} açık / ✅ {data['closed_issues']} kapalı issue"
-                    if data["open_prs"] > 0 or data["closed_prs"] > 0:
-                        msg += f"\n🔀 {data['open_prs']} açık / 🔀 {data['closed_prs']} kapalı PR"
-
-                    await send_with_delay(
-                        notifier.send_embed(
-                            category="stats",
-                            title="🆕 Yeni Repo Takibe Alındı",
-                            description=msg,
-                            color=0x2ECC71,  # Yeşil
-                        ),
-                        delay=1.0,  # 1 saniye bekle
-                    )
-                    notification_count += 1
-                    print(f"  📨 Yeni repo bildirimi: {repo_name}")
-
-            # Varolan repolardaki değişiklikler
-            for repo_key in old_stats:
-                if repo_key in new_stats:
-                    old = old_stats[repo_key]
-                    new = new_stats[repo_key]
-
-                    changes = compare_stats(old, new)
-
-                    if changes:
-                        platform, repo_name = repo_key.split("_", 1)
-                        msg = f"**{repo_name}** ({platform.upper()})\n" + "\n".join(
-                            changes
-                        )
-
-                        await send_with_delay(
-                            notifier.send_embed(
-                                category="stats",
-                                title="📊 Repo Güncellemesi",
-                                description=msg,
-                                color=0x3498DB,  # Mavi
-                            ),
-                            delay=1.0,  # 1 saniye bekle
-                        )
-                        notification_count += 1
-                        print(
-                            f"  📨 Güncelleme bildirimi: {repo_name} ({len(changes)} değişiklik)"
-                        )
-
-            if notification_count == 0:
-                print("  ℹ️ Değişiklik yok, bildirim gönderilmedi.")
-            else:
-                print(
-                    f"  ✅ {notification_count} bildirim gönderildi. (Her biri arasında 1 saniye beklendi)"
+            # 3. Sadece Change_Log'a düşen değişiklikler okunur ve bildirilir
+            changed_ids = await process_changes(pipeline_transitions, lease, since_id)
+
+            # 4. Değişim görülen repolar daha sık, boşta kalanlar daha seyrek yoklanır;
+            # mark_checked görmeyen (hata/zaman aşımı) repolar taban aralıkla denenir
+            checked_at = time.time()
+            checked = (
+                await asyncio.to_thread(checked_since, sync_started) if due else set()
+            )
+            for repo_id in due:
+                scheduler.record(
+                    repo_id,
+                    repo_id in changed_ids,
+                    checked_at,
+                    failed=repo_id not in checked,
                 )
 
-            # 5. Bekleme
-            print("😴 1000 saniye bekleniyor... (16.6 dakika)")
-            await asyncio.sleep(7000)
+            # Eski metrik satırları saatlik/günlük özetlere indirgenir
+            if leader and time.time() >= next_rollup:
+                await asyncio.to_thread(rollup)
+                next_rollup = time.time() + ROLLUP_INTERVAL
+                save_checkpoint("next_rollup", next_rollup)
+            # Döngü sonu ve kota durumu; flush planla birlikte yazılmasını bekler
+            if leader:
+                save_checkpoint("cycle", {"stage": "done"})
+            save_checkpoint(rate_limit_checkpoint(), http.rate_limits.export_state())
+            await asyncio.to_thread(writer.flush)
+            CYCLE_SECONDS.observe(time.monotonic() - cycle_started)
+
+            # 5. Bekleme: en yakın vadeye ya da repo listesi yenilemesine kadar;
+            # bu sırada gelen webhook olayları hemen uygulanır
+            await wait_for_next_cycle(http, scheduler, next_discovery, receiver, lease)
 
         except KeyboardInterrupt:
             print("\n🛑 Kullanıcı tarafından durduruldu.")
@@ -238,26 +438,59 @@ async def run_sync_loop():
 async def main():
     print("🛠️  ADIM 1: Veritabanı hazırlanıyor...")
     create_database()
+    checkpoints = load_checkpoints()
 
     print("🤖 Gitty Bot başlatılıyor...")
     print("📨 Webhook bildirimleri aktif")
-
-    # Webhook test mesajı (isteğe bağlı)
+    # Çok worker'lı mod: repo shard'ları Worker_Leases üzerinden paylaşılır
+    lease = heartbeat_task = None
+    if SHARD_COUNT:
+        lease = ShardLease()
+        await asyncio.to_thread(lease.heartbeat)
+        heartbeat_task = asyncio.create_task(lease.run())
+
+    # Discord'a giden tüm mesajlar tek keep-alive oturumu paylaşır
+    await notifier.start()
+    # Önceki çalışmadan kalan gönderilmemiş bildirimler de bu worker ile gider;
+    # çok worker'lı modda outbox'ı sadece lider boşaltır
+    active = (lambda: lease.is_leader) if lease is not None else None
+    outbox_task = asyncio.create_task(outbox.run(active))
+    receiver = telemetry = None
     try:
-        await send_with_delay(
-            notifier.send_embed(
-                category="stats",
-                title="🚀 Gitty Bot Aktif",
-                description="Repo takibi başladı! Tüm değişiklikler bildirilecek.\n⏱️ Rate limit koruması: 2 saniye",
-                color=0x9B59B6,  # Mor
-            ),
-            delay=2.0,
-        )
-        print("✅ Test bildirimi gönderildi.")
-    except Exception as e:
-        print(f"⚠️ Test bildirimi gönderilemedi: {e}")
+        # Webhook test mesajı (isteğe bağlı); çok worker'lı modda sadece lider,
+        # çökme/yeniden başlatma sonrası hiç gönderilmez
+        if is_resume(checkpoints):
+            print("♻️ Yeniden başlatma algılandı, başlangıç bildirimi atlandı.")
+        elif lease is None or lease.is_leader:
+            try:
+                await notifier.send_embed(
+                    category="stats",
+                    title="🚀 Gitty Bot Aktif",
+                    description="Repo takibi başladı! Tüm değişiklikler bildirilecek.\n⏱️ Rate limit koruması: Discord rate limit başlıklarına göre",
+                    color=0x9B59B6,  # Mor
+                )
+                print("✅ Test bildirimi gönderildi.")
+            except Exception as e:
+                print(f"⚠️ Test bildirimi gönderilemedi: {e}")
 
-    await run_sync_loop()
+        if RECEIVER_PORT:
+            receiver = await WebhookReceiver().start()
+        if TELEMETRY_PORT:
+            telemetry = await TelemetryServer().start()
+
+        # Tek event loop, tek keep-alive HTTP havuzu: tüm senkron döngüleri paylaşır
+        async with HttpClient() as http:
+            await run_sync_loop(http, receiver, lease, checkpoints)
+    finally:
+        if lease is not None:
+            heartbeat_task.cancel()
+            await asyncio.to_thread(lease.release)
+        if receiver is not None:
+            await receiver.close()
+        if telemetry is not None:
+            await telemetry.close()
+        outbox_task.cancel()
+        await notifier.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+import sqlite3
+
+from services.db_create import DB_PATH
+from services.db_writer import writer
+
+# Sync_Cursors'ta repoya bağlı olmayan tüketici imleci (repo_id = 0)
+CURSOR_REPO_ID = 0
+CURSOR_KIND = "change_log"
+
+
+def load_cursor():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute(
+            "SELECT value FROM Sync_Cursors WHERE repo_id = ? AND kind = ?",
+            (CURSOR_REPO_ID, CURSOR_KIND),
+        ).fetchone()
+    finally:
+        conn.close()
+    return int(row[0]) if row else 0
+
+
+def load_changes(after_id):
+    """
+    İmleçten sonraki değişiklikler, repo bazında birleştirilmiş:
+    {repo_id: {"added": bool, "fields": {alan: (ilk eski, son yeni)}}}, son id.
+    Maliyet fleet boyutuyla değil değişiklik sayısıyla orantılı.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            """
+            SELECT id, repo_id, field, old_value, new_value FROM Change_Log
+            WHERE id > ? ORDER BY id
+        """,
+            (after_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    changes, last_id = {}, after_id
+    for row_id, repo_id, field, old_value, new_value in rows:
+        last_id = row_id
+        entry = changes.setdefault(repo_id, {"added": False, "fields": {}})
+        if field == "repo_added":
+            entry["added"] = True
+            continue
+        first_old = entry["fields"].get(field, (old_value, None))[0]
+        entry["fields"][field] = (first_old, new_value)
+
+    # Aynı pencerede gidip geri gelen değerler değişiklik sayılmaz
+    for entry in changes.values():
+        entry["fields"] = {
+            field: values
+            for field, values in entry["fields"].items()
+            if values[0] != values[1]
+        }
+    changes = {
+        repo_id: entry
+        for repo_id, entry in changes.items()
+        if entry["added"] or entry["fields"]
+    }
+    return changes, last_id
+
+
+def last_change_id():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM Change_Log").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def changed_repo_ids(after_id):
+    """
+    İmleci ilerletmeden, after_id'den sonra değişen repolar (lider olmayan worker'lar için).
+    Lider bu arada kayıtları budadıysa bazı değişiklikler görülmeyebilir; bu
+    sadece o reponun bir sonraki kontrolünü geciktirir.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT repo_id FROM Change_Log WHERE id > ?", (after_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row[0] for row in rows}
+
+
+def advance_cursor(last_id):
+    """İşlenen kayıtları siler ve imleci ilerletir (bir sonraki writer.flush ile)"""
+    writer.submit(
+        "cursor", {"repo_id": CURSOR_REPO_ID, "kind": CURSOR_KIND, "value": last_id}
+    )
+    writer.submit("change_log_prune", {"last_id": last_id})
+
+
+def rebuild_old_stats(current, fields):
+    """Güncel istatistikler + değişen alanların eski değerleri = compare_stats için eski hal"""
+    old = dict(current)
+    for field, (old_value, _) in fields.items():
+        old[field] = old_value or 0
+    return old
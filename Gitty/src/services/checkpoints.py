@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from services.db_create import DB_PATH
+from services.db_writer import writer
+
+# Son döngü kaydı bundan yeniyse açılış yeniden başlatma sayılır
+# (ör. çökme/konteyner yenilemesi): başlangıç bildirimi gönderilmez
+RESUME_WINDOW = int(os.getenv("GITTY_RESUME_WINDOW", "3600"))
+
+
+def load_checkpoints():
+    """{ad: (değer, updated_at)}; tablo yoksa (eski şema) boş"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT name, value, updated_at FROM Sync_Checkpoints"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    return {name: (json.loads(value), updated_at) for name, value, updated_at in rows}
+
+
+def save_checkpoint(name, value, now=None):
+    """Writer kuyruğuna yazar; aynı batch'teki kayıtlarla birlikte commit edilir"""
+    writer.submit(
+        "checkpoint",
+        {
+            "name": name,
+            "value": json.dumps(value),
+            "updated_at": int(now or time.time()),
+        },
+    )
+
+
+def rate_limit_checkpoint():
+    """
+    Kota durumunun checkpoint adı, token'lara göre: farklı token'lı worker'lar
+    birbirinin bucket'larını yüklemez; aynı token'lı süreç yeniden başlayınca bulur.
+    """
+    tokens = f"{os.getenv('GITHUB_TOKEN', '')}\0{os.getenv('GITLAB_TOKEN', '')}"
+    return f"rate_limits:{hashlib.sha256(tokens.encode()).hexdigest()[:12]}"
+
+
+def mark_checked(repo_id, now=None):
+    """Repo kontrolü bitti; yeniden başlatmada tazelik penceresinde atlanır"""
+    writer.submit(
+        "checked", {"repo_id": repo_id, "checked_at": int(now or time.time())}
+    )
+
+
+def checked_since(since):
+    """since'ten (dahil) sonra kontrolü başarıyla biten repo id'leri"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT repo_id FROM Poll_Schedule WHERE last_checked_at >= ?", (since,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {repo_id for (repo_id,) in rows}
+
+
+def is_resume(checkpoints, now=None):
+    """Önceki çalışma yakın zamanda döngü kaydı bıraktıysa True"""
+    cycle = checkpoints.get("cycle")
+    return cycle is not None and (now or time.time()) - cycle[1] < RESUME_WINDOW
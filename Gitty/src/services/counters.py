@@ -0,0 +1,194 @@
+import os
+from urllib.parse import parse_qs, quote, urlparse
+
+from services.github_graphql import GraphQLError, run_query
+from services.telemetry import COMMIT_COUNTS
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITLAB_URL = os.getenv("GITLAB_URL", "https://gitlab.com").rstrip("/")
+
+# Her sayım O(1) istek: nesneler listelenmez, sadece toplam bilgisi okunur.
+
+GITHUB_ISSUE_COUNT_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    openIssues: issues(states: OPEN) { totalCount }
+    closedIssues: issues(states: CLOSED) { totalCount }
+  }
+}
+"""
+
+GITLAB_MR_COUNT_QUERY = """
+query($path: ID!, $state: MergeRequestState!) {
+  project(fullPath: $path) { mergeRequests(state: $state) { count } }
+}
+"""
+
+
+def _last_page(resp):
+    """per_page=1 isteğinde rel="last" sayfa numarası = toplam eleman sayısı"""
+    last = resp.links.get("last")
+    if last:
+        return int(parse_qs(urlparse(last).query)["page"][0])
+    return len(resp.json() or [])
+
+
+async def github_issue_counts(client, r_name):
+    """(açık, kapalı) issue sayısı; PR'lar hariç, tek GraphQL isteği"""
+    owner, name = r_name.split("/", 1)
+    data = await run_query(
+        client, GITHUB_ISSUE_COUNT_QUERY, {"owner": owner, "name": name}
+    )
+    repo = data["repository"]
+    if repo is None:
+        raise GraphQLError(f"{r_name} not found")
+    return repo["openIssues"]["totalCount"], repo["closedIssues"]["totalCount"]
+
+
+async def github_list_count(client, r_name, endpoint, params=None):
+    resp = await client.get(
+        f"{GITHUB_API_URL}/repos/{r_name}/{endpoint}",
+        params={**(params or {}), "per_page": 1},
+    )
+    resp.raise_for_status()
+    return _last_page(resp)
+
+
+async def github_pr_counts(client, r_name):
+    """(açık, kapalı+merged) PR sayısı"""
+    return (
+        await github_list_count(client, r_name, "pulls", {"state": "open"}),
+        await github_list_count(client, r_name, "pulls", {"state": "closed"}),
+    )
+
+
+async def github_commit_count(client, r_name, head=None):
+    """Varsayılan dal (head verilirse o commit'e kadar) commit sayısı"""
+    return await github_list_count(
+        client, r_name, "commits", {"sha": head} if head else None
+    )
+
+
+async def github_commits_since(client, r_name, base, head):
+    """base'den head'e eklenen commit sayısı; head base'in devamı değilse None"""
+    resp = await client.get(
+        f"{GITHUB_API_URL}/repos/{r_name}/compare/{base}...{head}",
+        params={"per_page": 1},
+    )
+    # Force-push sonrası eski head silinmiş olabilir
+    if resp.status == 404:
+        return None
+    resp.raise_for_status()
+    data = resp.json()
+    if data["status"] in ("ahead", "identical"):
+        return data["ahead_by"]
+    return None
+
+
+def _gitlab_project_url(r_name, endpoint=""):
+    url = f"{GITLAB_URL}/api/v4/projects/{quote(r_name, safe='')}"
+    return f"{url}/{endpoint}" if endpoint else url
+
+
+async def gitlab_issue_counts(client, r_name):
+    """(açık, kapalı) issue sayısı; issues_statistics tek istek"""
+    resp = await client.get(_gitlab_project_url(r_name, "issues_statistics"))
+    resp.raise_for_status()
+    counts = resp.json()["statistics"]["counts"]
+    return counts["opened"], counts["closed"]
+
+
+async def gitlab_mr_count(client, r_name, state):
+    resp = await client.get(
+        _gitlab_project_url(r_name, "merge_requests"),
+        params={"state": state, "per_page": 1},
+    )
+    resp.raise_for_status()
+    total = resp.headers.get("X-Total")
+    if total is not None:
+        return int(total)
+
+    # 10.000 üzeri sonuçta GitLab X-Total göndermez -> GraphQL count
+    resp = await client.post(
+        f"{GITLAB_URL}/api/graphql",
+        json={
+            "query": GITLAB_MR_COUNT_QUERY,
+            "variables": {"path": r_name, "state": state},
+        },
+        idempotent=True,
+    )
+    resp.raise_for_status()
+    return resp.json()["data"]["project"]["mergeRequests"]["count"]
+
+
+async def gitlab_mr_counts(client, r_name):
+    """(açık, merged+kapalı) MR sayısı"""
+    return (
+        await gitlab_mr_count(client, r_name, "opened"),
+        await gitlab_mr_count(client, r_name, "merged")
+        + await gitlab_mr_count(client, r_name, "closed"),
+    )
+
+
+async def gitlab_commit_count(client, r_name, head=None):
+    """
+    Varsayılan dal (head verilirse o commit'e kadar) commit sayısı;
+    X-Total yoksa proje istatistikleri
+    """
+    params = {"per_page": 1}
+    if head:
+        params["ref_name"] = head
+    resp = await client.get(
+        _gitlab_project_url(r_name, "repository/commits"), params=params
+    )
+    resp.raise_for_status()
+    total = resp.headers.get("X-Total")
+    if total is not None:
+        return int(total)
+
+    resp = await client.get(_gitlab_project_url(r_name), params={"statistics": "true"})
+    resp.raise_for_status()
+    return resp.json()["statistics"]["commit_count"]
+
+
+async def _gitlab_range_count(client, r_name, rev_range):
+    """ref_name aralığındaki commit sayısı (X-Total); bilinmiyorsa None"""
+    resp = await client.get(
+        _gitlab_project_url(r_name, "repository/commits"),
+        params={"ref_name": rev_range, "per_page": 1},
+    )
+    if resp.status in (400, 404):
+        return None
+    resp.raise_for_status()
+    total = resp.headers.get("X-Total")
+    return int(total) if total is not None else None
+
+
+async def gitlab_commits_since(client, r_name, base, head):
+    """base'den head'e eklenen commit sayısı; head base'in devamı değilse None"""
+    # head..base boş değilse base head'in atası değil: geçmiş yeniden yazılmış
+    if await _gitlab_range_count(client, r_name, f"{head}..{base}") != 0:
+        return None
+    return await _gitlab_range_count(client, r_name, f"{base}..{head}")
+
+
+async def incremental_commit_count(
+    client, r_name, platform, cursor, head, count_since, count_all
+):
+    """
+    "sha:sayı" imlecinden head'deki commit sayısı: head değişmediyse imleçteki
+    sayı, ilerlediyse sadece aradaki commit'ler eklenir. İmleç yoksa ya da
+    geçmiş yeniden yazıldıysa (force-push) count_all ile baştan sayılır;
+    tam sayım da head'e sabitlenir, arada gelen push imleci kaydırmaz.
+    """
+    if cursor:
+        base, _, base_count = cursor.partition(":")
+        if base == head:
+            COMMIT_COUNTS.inc(platform=platform, mode="unchanged")
+            return int(base_count)
+        added = await count_since(client, r_name, base, head)
+        if added is not None:
+            COMMIT_COUNTS.inc(platform=platform, mode="incremental")
+            return int(base_count) + added
+    COMMIT_COUNTS.inc(platform=platform, mode="full")
+    return await count_all(client, r_name, head)
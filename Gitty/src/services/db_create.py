@@ -13,50 +13,307 @@ DB_NAME = os.getenv("DB_NAME", "git_flow.db")
 
 FINAL_DB_DIR = os.path.join(BASE_DIR, DB_DIR.replace("../", ""))
 DB_PATH = os.path.join(FINAL_DB_DIR, DB_NAME)
+CACHE_NAME = os.getenv("HTTP_CACHE_NAME", "http_cache.db")
+CACHE_PATH = os.path.join(FINAL_DB_DIR, CACHE_NAME)
 
 
-def create_database():
-    conn = None
-    try:
-        if not os.path.exists(FINAL_DB_DIR):
-            os.makedirs(FINAL_DB_DIR)
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Repositories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform VARCHAR(50),
-                repo_name VARCHAR(255),
-                star_count INTEGER,
-                fork_count INTEGER
+def _create_base_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Repositories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform VARCHAR(50),
+            repo_name VARCHAR(255),
+            star_count INTEGER,
+            fork_count INTEGER
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Repo_Stats (
+            repo_id INTEGER,
+            total_commits INTEGER,
+            open_issues INTEGER,
+            closed_issues INTEGER,
+            open_prs INTEGER,
+            closed_prs INTEGER,
+            FOREIGN KEY (repo_id) REFERENCES Repositories(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Pipelines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repo_id INTEGER,
+            status VARCHAR(20),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (repo_id) REFERENCES Repositories(id)
+        )
+    """)
+
+
+def _add_unique_keys(cursor):
+    # Aynı (platform, repo_name) için en küçük id kalır, istatistikler ona taşınır
+    for table in ("Repo_Stats", "Pipelines"):
+        cursor.execute(f"""
+            UPDATE {table} SET repo_id = (
+                SELECT MIN(r2.id) FROM Repositories r1
+                JOIN Repositories r2
+                  ON r2.platform = r1.platform AND r2.repo_name = r1.repo_name
+                WHERE r1.id = {table}.repo_id
             )
+            WHERE repo_id IN (SELECT id FROM Repositories)
         """)
+    cursor.execute("""
+        DELETE FROM Repositories WHERE id NOT IN (
+            SELECT MIN(id) FROM Repositories GROUP BY platform, repo_name
+        )
+    """)
+    # Repo başına en son yazılan Repo_Stats satırı kalır
+    cursor.execute("""
+        DELETE FROM Repo_Stats WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM Repo_Stats GROUP BY repo_id
+        )
+    """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Repo_Stats (
-                repo_id INTEGER,
-                total_commits INTEGER,
-                open_issues INTEGER,
-                closed_issues INTEGER,
-                open_prs INTEGER,
-                closed_prs INTEGER,
-                FOREIGN KEY (repo_id) REFERENCES Repositories(id)
-            )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_repositories_platform_name "
+        "ON Repositories(platform, repo_name)"
+    )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_repo_stats_repo_id ON Repo_Stats(repo_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_pipelines_repo_id ON Pipelines(repo_id)"
+    )
+
+
+def _add_pipeline_cursors(cursor):
+    cursor.execute("ALTER TABLE Pipelines ADD COLUMN pipeline_id INTEGER")
+    cursor.execute("ALTER TABLE Pipelines ADD COLUMN ref TEXT")
+    cursor.execute("ALTER TABLE Pipelines ADD COLUMN updated_at DATETIME")
+    # Eski sürüm her döngüde aynı 5 pipeline'ı ekliyordu; tekrarları at
+    cursor.execute("""
+        DELETE FROM Pipelines WHERE id NOT IN (
+            SELECT MAX(id) FROM Pipelines GROUP BY repo_id, created_at
+        )
+    """)
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_pipelines_repo_pipeline "
+        "ON Pipelines(repo_id, pipeline_id)"
+    )
+    # Repo + tür başına artımlı senkronizasyon imleci (ör. pipelines -> updated_after)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Sync_Cursors (
+            repo_id INTEGER,
+            kind VARCHAR(50),
+            value TEXT,
+            PRIMARY KEY (repo_id, kind),
+            FOREIGN KEY (repo_id) REFERENCES Repositories(id)
+        )
+    """)
+
+
+def _add_poll_schedule(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Poll_Schedule (
+            repo_id INTEGER PRIMARY KEY,
+            next_due INTEGER,
+            interval INTEGER,
+            last_checked_at INTEGER,
+            last_change_at INTEGER,
+            FOREIGN KEY (repo_id) REFERENCES Repositories(id)
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_poll_schedule_next_due ON Poll_Schedule(next_due)"
+    )
+
+
+def _add_notification_outbox(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Notification_Outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category VARCHAR(50) NOT NULL,
+            embed TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at INTEGER NOT NULL,
+            next_attempt_at INTEGER NOT NULL,
+            delivered_at INTEGER,
+            last_error TEXT
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_outbox_pending "
+        "ON Notification_Outbox(status, next_attempt_at)"
+    )
+
+
+# Change_Log alan adı -> (tablo, kolon); alan adları get_current_stats anahtarlarıyla aynı
+CHANGE_LOG_FIELDS = {
+    "stars": ("Repositories", "star_count"),
+    "forks": ("Repositories", "fork_count"),
+    "commits": ("Repo_Stats", "total_commits"),
+    "open_issues": ("Repo_Stats", "open_issues"),
+    "closed_issues": ("Repo_Stats", "closed_issues"),
+    "open_prs": ("Repo_Stats", "open_prs"),
+    "closed_prs": ("Repo_Stats", "closed_prs"),
+}
+
+
+def _add_change_log(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Change_Log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repo_id INTEGER NOT NULL,
+            field VARCHAR(50) NOT NULL,
+            old_value INTEGER,
+            new_value INTEGER,
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Değişiklikler yazıldıkları anda, yazan kod ne olursa olsun kaydedilir
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_repo_added
+        AFTER INSERT ON Repositories
+        BEGIN
+            INSERT INTO Change_Log (repo_id, field) VALUES (new.id, 'repo_added');
+        END
+    """)
+    for field, (table, column) in CHANGE_LOG_FIELDS.items():
+        repo_id = "new.id" if table == "Repositories" else "new.repo_id"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_{field}
+            AFTER UPDATE OF {column} ON {table}
+            WHEN old.{column} IS NOT new.{column}
+            BEGIN
+                INSERT INTO Change_Log (repo_id, field, old_value, new_value)
+                VALUES ({repo_id}, '{field}', old.{column}, new.{column});
+            END
         """)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Pipelines (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                repo_id INTEGER,
-                status VARCHAR(20),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (repo_id) REFERENCES Repositories(id)
+
+def _add_repo_metrics(cursor):
+    # Sadece değişiklik olan (repo, zaman dilimi) için satır: sütunlar o dilimdeki farklar.
+    # resolution: 0 = ham (dakika), 3600 = saatlik, 86400 = günlük
+    columns = ",\n            ".join(
+        f"{field} INTEGER NOT NULL DEFAULT 0" for field in CHANGE_LOG_FIELDS
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS Repo_Metrics (
+            repo_id INTEGER NOT NULL,
+            resolution INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            {columns},
+            PRIMARY KEY (repo_id, resolution, ts)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_repo_metrics_ts ON Repo_Metrics(resolution, ts)"
+    )
+
+
+def _add_worker_leases(cursor):
+    # Çok worker'lı mod: her canlı worker bir kira satırı tutar, shard aralığı
+    # [shard_start, shard_end) canlı worker listesinden hesaplanır
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Worker_Leases (
+            worker_id TEXT PRIMARY KEY,
+            shard_start INTEGER NOT NULL,
+            shard_end INTEGER NOT NULL,
+            shard_count INTEGER NOT NULL,
+            heartbeat_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL
+        )
+    """)
+
+
+def _add_repo_activity(cursor):
+    # Keşifte artık görünmeyen (silinen, erişimi kalkan) repolar silinmez, pasifleşir;
+    # last_seen_at tam taramada hangi repoların görülmediğini ayırt eder
+    cursor.execute(
+        "ALTER TABLE Repositories ADD COLUMN active INTEGER NOT NULL DEFAULT 1"
+    )
+    cursor.execute("ALTER TABLE Repositories ADD COLUMN last_seen_at INTEGER")
+
+
+def _add_sync_checkpoints(cursor):
+    # Döngü aşamalarının kalıcı durumu (JSON değer); yeniden başlatmada okunur
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Sync_Checkpoints (
+            name TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at INTEGER NOT NULL
+        )
+    """)
+
+
+def _drop_legacy_pipelines(cursor):
+    # pipeline_id'siz satırlar geri doldurulamaz (GitLab id'si hiç saklanmadı);
+    # unique index NULL'ları ayırmadığından upsert'lerle eşleşmez, kalırlar
+    cursor.execute("DELETE FROM Pipelines WHERE pipeline_id IS NULL")
+
+
+# (sürüm, açıklama, fonksiyon) - sadece sona ekle, var olanları değiştirme
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "unique repo keys and stats index", _add_unique_keys),
+    (3, "pipeline ids and sync cursors", _add_pipeline_cursors),
+    (4, "per-repo poll schedule", _add_poll_schedule),
+    (5, "notification outbox", _add_notification_outbox),
+    (6, "change log triggers", _add_change_log),
+    (7, "repo metrics time series", _add_repo_metrics),
+    (8, "worker shard leases", _add_worker_leases),
+    (9, "repository active flag", _add_repo_activity),
+    (10, "sync checkpoints", _add_sync_checkpoints),
+    (11, "drop pipelines without ids", _drop_legacy_pipelines),
+]
+
+
+def migrate(conn):
+    """schema_version'dan sonraki migration'ları sırayla, her biri kendi transaction'ında uygular"""
+    conn.isolation_level = None
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    current = cursor.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+    current = current or 0
+
+    for version, name, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (version, name),
             )
-        """)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        print(f"  🧱 Migration {version}: {name}")
+        current = version
+    return current
 
-        conn.commit()
-        print("Hmm DATABASE: READY!")
+
+def create_database():
+    conn = None
+    try:
+        if not os.path.exists(FINAL_DB_DIR):
+            os.makedirs(FINAL_DB_DIR)
+        # Yeni DB + eski ETag cache = 304 yüzünden hiç doldurulmayan tablolar
+        if not os.path.exists(DB_PATH) and os.path.exists(CACHE_PATH):
+            os.remove(CACHE_PATH)
+        conn = sqlite3.connect(DB_PATH)
+        version = migrate(conn)
+        print(f"Hmm DATABASE: READY! (schema v{version})")
 
     except sqlite3.Error as e:
         print(f"SQLite Errorr !!: {e}")
@@ -0,0 +1,393 @@
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from operator import itemgetter
+
+from services.db_create import CHANGE_LOG_FIELDS, DB_PATH
+from services.http_client import is_transient
+from services.telemetry import DB_COMMIT_SECONDS, DB_ERRORS, DB_ROWS, DB_WRITE_SECONDS
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+# busy_timeout dolduktan sonra BEGIN IMMEDIATE için ek tekrar sayısı ve bekleme tabanı
+LOCK_RETRIES = int(os.getenv("GITTY_DB_LOCK_RETRIES", "5"))
+LOCK_BACKOFF = float(os.getenv("GITTY_DB_LOCK_BACKOFF", "0.1"))
+
+STATS_COLUMNS = (
+    "repo_id, total_commits, open_issues, closed_issues, open_prs, closed_prs"
+)
+
+METRIC_FIELDS = tuple(CHANGE_LOG_FIELDS)
+_METRIC_COLUMNS = ", ".join(METRIC_FIELDS)
+_METRIC_SUMS = ", ".join(f"SUM({f})" for f in METRIC_FIELDS)
+_METRIC_ADD = ", ".join(f"{f} = {f} + excluded.{f}" for f in METRIC_FIELDS)
+
+_PIPELINE_UPSERT = (
+    "INSERT INTO Pipelines (repo_id, pipeline_id, status, ref, created_at, updated_at) "
+    "VALUES (:repo_id, :pipeline_id, :status, :ref, :created_at, :updated_at) "
+    "ON CONFLICT(repo_id, pipeline_id) DO UPDATE SET "
+    "status = excluded.status, updated_at = excluded.updated_at"
+)
+
+# Kayıt türü -> sırayla executemany ile çalışacak ifadeler.
+# Unique index'ler (schema v2) sayesinde her kayıt tek bir UPSERT.
+RECORD_SQL = {
+    # Webhook: sadece takip edilen repo güncellenir, yeni satır açılmaz
+    "repo_counts": (
+        "UPDATE Repositories SET star_count = :stars, fork_count = :forks "
+        "WHERE platform = :platform AND repo_name = :repo_name",
+    ),
+    # Keşifte görülen repo: yeniden aktifleşir, görülme zamanı güncellenir
+    "repo_seen": (
+        "INSERT INTO Repositories "
+        "(platform, repo_name, star_count, fork_count, active, last_seen_at) "
+        "VALUES (:platform, :repo_name, :stars, :forks, 1, :seen_at) "
+        "ON CONFLICT(platform, repo_name) DO UPDATE SET "
+        "star_count = excluded.star_count, fork_count = excluded.fork_count, "
+        "active = 1, last_seen_at = excluded.last_seen_at",
+    ),
+    # Tam taramada hiçbir kaynakta görülmeyen repolar
+    "repos_unseen": (
+        "UPDATE Repositories SET active = 0 WHERE platform = :platform "
+        "AND active = 1 AND COALESCE(last_seen_at, 0) < :before",
+    ),
+    # API 404 döndü: repo silinmiş ya da erişim kalkmış
+    "repo_inactive": ("UPDATE Repositories SET active = 0 WHERE id = :repo_id",),
+    # Tek görevde toplanan repo kaydı; None alanlar (304, değişmedi) olduğu gibi kalır
+    "repo_full": (
+        "UPDATE Repositories SET star_count = COALESCE(:stars, star_count), "
+        "fork_count = COALESCE(:forks, fork_count) WHERE id = :repo_id",
+        f"INSERT INTO Repo_Stats ({STATS_COLUMNS}) "
+        "VALUES (:repo_id, COALESCE(:commits, 0), COALESCE(:open_issues, 0), "
+        "COALESCE(:closed_issues, 0), COALESCE(:open_prs, 0), COALESCE(:closed_prs, 0)) "
+        "ON CONFLICT(repo_id) DO UPDATE SET "
+        "total_commits = COALESCE(:commits, total_commits), "
+        "open_issues = COALESCE(:open_issues, open_issues), "
+        "closed_issues = COALESCE(:closed_issues, closed_issues), "
+        "open_prs = COALESCE(:open_prs, open_prs), "
+        "closed_prs = COALESCE(:closed_prs, closed_prs)",
+    ),
+    # Webhook farkları: sadece daha önce tam sayılmış repolara uygulanır
+    "stats_delta": (
+        "UPDATE Repo_Stats SET "
+        "total_commits = MAX(0, total_commits + :commits), "
+        "open_issues = MAX(0, open_issues + :open_issues), "
+        "closed_issues = MAX(0, closed_issues + :closed_issues), "
+        "open_prs = MAX(0, open_prs + :open_prs), "
+        "closed_prs = MAX(0, closed_prs + :closed_prs) "
+        "WHERE repo_id = (SELECT id FROM Repositories "
+        "WHERE platform = :platform AND repo_name = :repo_name)",
+    ),
+    "pipeline": (_PIPELINE_UPSERT,),
+    # Durum ve geçiş bildirimi aynı transaction'da: çökmede geçiş kaybolmaz
+    "pipeline_transition": (
+        _PIPELINE_UPSERT,
+        "INSERT INTO Notification_Outbox (category, embed, created_at, next_attempt_at) "
+        "VALUES (:category, :embed, :queued_at, :queued_at)",
+    ),
+    "schedule": (
+        "INSERT INTO Poll_Schedule (repo_id, next_due, interval, last_checked_at, last_change_at) "
+        "VALUES (:repo_id, :next_due, :interval, :checked_at, "
+        "CASE WHEN :changed THEN :checked_at END) "
+        "ON CONFLICT(repo_id) DO UPDATE SET "
+        "next_due = excluded.next_due, interval = excluded.interval, "
+        "last_checked_at = COALESCE(excluded.last_checked_at, last_checked_at), "
+        "last_change_at = COALESCE(excluded.last_change_at, last_change_at)",
+    ),
+    "outbox": (
+        "INSERT INTO Notification_Outbox (category, embed, created_at, next_attempt_at) "
+        "VALUES (:category, :embed, :created_at, :created_at)",
+    ),
+    "outbox_status": (
+        "UPDATE Notification_Outbox SET status = :status, attempts = :attempts, "
+        "next_attempt_at = :next_attempt_at, delivered_at = :delivered_at, "
+        "last_error = :last_error WHERE id = :id",
+    ),
+    "outbox_prune": (
+        "DELETE FROM Notification_Outbox "
+        "WHERE status != 'pending' AND created_at < :before",
+    ),
+    "change_log_prune": ("DELETE FROM Change_Log WHERE id <= :last_id",),
+    "metric": (
+        f"INSERT INTO Repo_Metrics (repo_id, resolution, ts, {_METRIC_COLUMNS}) "
+        f"VALUES (:repo_id, 0, :ts, {', '.join(':' + f for f in METRIC_FIELDS)}) "
+        f"ON CONFLICT(repo_id, resolution, ts) DO UPDATE SET {_METRIC_ADD}",
+    ),
+    # Bir çözünürlükteki eski satırları üst çözünürlüğe toplar ve siler
+    "metrics_rollup": (
+        f"INSERT INTO Repo_Metrics (repo_id, resolution, ts, {_METRIC_COLUMNS}) "
+        f"SELECT repo_id, :to_resolution, (ts / :to_resolution) * :to_resolution, "
+        f"{_METRIC_SUMS} FROM Repo_Metrics "
+        "WHERE resolution = :from_resolution AND ts < :before "
+        "GROUP BY repo_id, (ts / :to_resolution) "
+        f"ON CONFLICT(repo_id, resolution, ts) DO UPDATE SET {_METRIC_ADD}",
+        "DELETE FROM Repo_Metrics WHERE resolution = :from_resolution AND ts < :before",
+    ),
+    "metrics_expire": (
+        "DELETE FROM Repo_Metrics WHERE resolution = :resolution AND ts < :before",
+    ),
+    # Poll_Schedule'da repo kontrolü biter bitmez: yarıda kalan döngüde işlenmiş sayılır
+    "checked": (
+        "INSERT INTO Poll_Schedule (repo_id, last_checked_at) VALUES (:repo_id, :checked_at) "
+        "ON CONFLICT(repo_id) DO UPDATE SET last_checked_at = excluded.last_checked_at",
+    ),
+    "checkpoint": (
+        "INSERT INTO Sync_Checkpoints (name, value, updated_at) "
+        "VALUES (:name, :value, :updated_at) "
+        "ON CONFLICT(name) DO UPDATE SET "
+        "value = excluded.value, updated_at = excluded.updated_at",
+    ),
+    "cursor": (
+        "INSERT INTO Sync_Cursors (repo_id, kind, value) VALUES (:repo_id, :kind, :value) "
+        "ON CONFLICT(repo_id, kind) DO UPDATE SET value = excluded.value",
+    ),
+    "cursor_reset": (
+        "DELETE FROM Sync_Cursors WHERE kind = :kind AND repo_id = ("
+        "SELECT id FROM Repositories WHERE platform = :platform AND repo_name = :repo_name)",
+    ),
+}
+
+
+def configure_connection(conn):
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def is_locked(error):
+    """Başka bir yazıcı kilidi tutuyor: tekrar denenebilir hata"""
+    message = str(error)
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+def begin_immediate(conn, retries=LOCK_RETRIES, backoff=LOCK_BACKOFF):
+    """
+    Yazma kilidini transaction başında alır (isolation_level=None bağlantı).
+    Kilitliyse jitter'lı üstel bekleyip retries kez daha dener.
+    """
+    for attempt in range(retries + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if not is_locked(e) or attempt == retries:
+                raise
+            time.sleep(random.uniform(0, backoff * 2**attempt))
+
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+        self.failed = 0
+
+
+class DBWriter:
+    """
+    Tek thread, tek bağlantı: fetch worker'ları kayıtları kuyruğa atar,
+    writer art arda gelen aynı türden kayıtları executemany ile gruplar
+    (gönderim sırası korunur). Kuyruktan alınan her
+    batch kendi kısa transaction'ında commit edilir; yazma kilidi uzun süre
+    tutulmaz (diğer worker'ların writer'ı ve shard heartbeat'i bekler).
+    Kilit yüzünden yazılamayan batch atılmaz, bekleyip yeniden denenir.
+    """
+
+    MAX_PENDING = 5000
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._failed = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="gitty-db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, kind, record):
+        """Kayıt ekler, beklemez. record: RECORD_SQL ifadelerindeki isimli parametreler"""
+        if kind not in RECORD_SQL:
+            raise ValueError(f"Unknown record kind: {kind}")
+        self.start()
+        self._queue.put((kind, record))
+
+    def flush(self, timeout=None):
+        """Önceden eklenen her kayıt commit edilene kadar bekler; başarısız kayıt sayısını döner"""
+        self.start()
+        marker = _Flush()
+        self._queue.put(marker)
+        marker.done.wait(timeout)
+        return marker.failed
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _apply(self, conn, kind, records):
+        """Türün tüm ifadeleri tek savepoint'te: biri hata verirse hiçbiri kalmaz"""
+        conn.execute("SAVEPOINT record")
+        try:
+            for sql in RECORD_SQL[kind]:
+                conn.executemany(sql, records)
+        except sqlite3.Error:
+            # Bazı hatalarda (ör. disk dolu) SQLite transaction'ı kendisi geri alır
+            if conn.in_transaction:
+                conn.execute("ROLLBACK TO record")
+                conn.execute("RELEASE record")
+            raise
+        conn.execute("RELEASE record")
+
+    def _write(self, conn, batch):
+        """
+        Art arda gelen aynı türden kayıtlar tek executemany ile, gönderim sırasıyla
+        yazılır. Hatalı grup tek tek yeniden denenir: bozuk kayıt diğerlerini düşürmez.
+        Tür başına satır sayısını döner; kilit hatası batch'i geri aldırmak için yükselir.
+        """
+        counts = {}
+        for kind, group in groupby(batch, key=itemgetter(0)):
+            records = [record for _, record in group]
+            with DB_WRITE_SECONDS.time(kind=kind):
+                try:
+                    self._apply(conn, kind, records)
+                    written = len(records)
+                except sqlite3.Error as e:
+                    if is_locked(e) or not conn.in_transaction:
+                        raise
+                    written = 0
+                    for record in records:
+                        try:
+                            self._apply(conn, kind, [record])
+                            written += 1
+                        except sqlite3.Error as e:
+                            if is_locked(e) or not conn.in_transaction:
+                                raise
+                            self._failed += 1
+                            DB_ERRORS.inc(kind=kind)
+                            print(f"⚠️ DB writer error ({kind}): {e}")
+            counts[kind] = counts.get(kind, 0) + written
+        return counts
+
+    def _commit_batch(self, conn, batch):
+        begin_immediate(conn)
+        try:
+            counts = self._write(conn, batch)
+            with DB_COMMIT_SECONDS.time():
+                conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        for kind, count in counts.items():
+            DB_ROWS.inc(count, kind=kind)
+
+    def _drain(self, batch, markers, block):
+        """Kuyruktan en fazla MAX_PENDING kayıt toplar; kapanış istendiyse True"""
+        while len(batch) < self.MAX_PENDING:
+            try:
+                item = self._queue.get(block=block)
+            except queue.Empty:
+                return False
+            block = False
+            if item is None:
+                return True
+            if isinstance(item, _Flush):
+                markers.append(item)
+            else:
+                batch.append(item)
+        return False
+
+    def _run(self):
+        conn = configure_connection(
+            sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        )
+        batch, markers = [], []
+        stop = False
+        retries = 0
+        try:
+            while True:
+                if not stop:
+                    # Geri konan batch varken kuyrukta beklenmez
+                    stop = self._drain(batch, markers, block=not (batch or markers))
+                if batch:
+                    try:
+                        self._commit_batch(conn, batch)
+                    except sqlite3.Error as e:
+                        retries += 1
+                        DB_ERRORS.inc(kind="transaction")
+                        if not (stop and retries > LOCK_RETRIES):
+                            # Kayıtlar ve flush bekleyenleri sıradaki denemeye kalır
+                            print(
+                                f"⚠️ DB writer: {len(batch)} kayıt yazılamadı, "
+                                f"yeniden denenecek ({e})"
+                            )
+                            time.sleep(min(5, LOCK_BACKOFF * 2**retries))
+                            continue
+                        self._failed += len(batch)
+                        print(f"⚠️ DB writer: kapanışta {len(batch)} kayıt yazılamadı")
+                    retries = 0
+                    batch = []
+
+                for marker in markers:
+                    marker.failed = self._failed
+                    marker.done.set()
+                if markers:
+                    self._failed = 0
+                    markers = []
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+
+writer = DBWriter()
+
+
+def fetch_error(error):
+    """
+    Hata veren metrik isteğinin (probe, değerler) sonucu. Geçici hata False:
+    repo kontrol edilmemiş sayılır; kalıcı 4xx (ör. boş repo) değişmemiş gibi.
+    """
+    return None, (False if is_transient(error) else {})
+
+
+def submit_repo_record(r_id, results):
+    """
+    (probe, değerler) sonuçlarını birleştirir; değişen bir şey varsa tek kayıt yazar.
+    değerler None: repo artık yok (404), repo pasifleşir.
+    değerler False: istek geçici hatayla başarısız, diğer metrikler yine yazılır.
+    (probe'lar, tüm istekler başarılı mı) döner.
+    """
+    record = {"repo_id": r_id, **dict.fromkeys(METRIC_FIELDS)}
+    probes = []
+    ok = True
+    for probe, values in results:
+        if values is None:
+            writer.submit("repo_inactive", {"repo_id": r_id})
+            return [], True
+        if values is False:
+            ok = False
+            continue
+        if probe:
+            probes.append(probe)
+        record.update(values)
+    # 304 ile değişmeyen metrikler None kalır, DB'deki değer korunur
+    if any(record[field] is not None for field in METRIC_FIELDS):
+        writer.submit("repo_full", record)
+    return probes, ok
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+from services.db_create import DB_PATH
+from services.db_writer import writer
+from services.http_client import REQUEST_ERRORS
+from services.telemetry import DISCOVERED_REPOS
+
+# Artımlı liste silinen repoları göremez: bu aralıkta (sn) kaynaklar baştan
+# listelenir ve hiçbirinde görülmeyen repolar pasifleşir. 0 = kapalı
+FULL_SWEEP_INTERVAL = int(os.getenv("GITTY_DISCOVERY_FULL_INTERVAL", "86400"))
+# Sync_Cursors'ta repoya bağlı olmayan imleçler (repo_id = 0)
+CURSOR_REPO_ID = 0
+
+
+def parse_sources(value, kinds):
+    """ "user, org:acme" -> [("user", ""), ("org", "acme")]; bilinmeyen tür ValueError"""
+    sources = []
+    for item in value.split(","):
+        kind, _, name = item.strip().partition(":")
+        kind, name = kind.strip().lower(), name.strip()
+        if not kind:
+            continue
+        if kind not in kinds:
+            raise ValueError(f"Unknown discovery source: {item.strip()}")
+        if (kind, name) not in sources:
+            sources.append((kind, name))
+    return sources
+
+
+def source_label(source):
+    kind, name = source
+    return f"{kind}:{name}" if name else kind
+
+
+def cursor_kind(platform, source):
+    return f"discovery:{platform}:{source_label(source)}"
+
+
+def load_cursors(platform):
+    """{imleç türü: değer} - kaynak imleçleri ve son tam tarama zamanı"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT kind, value FROM Sync_Cursors WHERE repo_id = ? AND kind LIKE ?",
+            (CURSOR_REPO_ID, f"discovery:{platform}:%"),
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+async def discover(platform, sources, list_source, cache, now=None):
+    """
+    Stage 1: her kaynağı kendi imlecinden itibaren listeler (kaynaklar paralel),
+    birden çok kaynakta görünen repolar tek kayda iner. Tam taramada hiçbir
+    kaynakta görülmeyen repolar pasifleşir; bir kaynak hata verdiyse pasifleştirme
+    ve tarama zamanı bir sonraki tura kalır.
+    list_source(source, since) -> (repolar, en yeni zaman damgası, doğrulayıcılar)
+    """
+    now = int(now or time.time())
+    cursors = load_cursors(platform)
+    sweep_kind = f"discovery:{platform}:sweep"
+    full = (
+        FULL_SWEEP_INTERVAL > 0
+        and now - int(cursors.get(sweep_kind, 0)) >= FULL_SWEEP_INTERVAL
+    )
+
+    async def list_one(source):
+        since = None if full else cursors.get(cursor_kind(platform, source))
+        try:
+            return await list_source(source, since)
+        except REQUEST_ERRORS as e:
+            print(f"⚠️ {platform} discovery ({source_label(source)}) failed: {e}")
+            return None
+
+    results = await asyncio.gather(*(list_one(source) for source in sources))
+    seen, validators = {}, []
+    for source, result in zip(sources, results):
+        if result is None:
+            continue
+        repos, newest, source_validators = result
+        for repo_name, stars, forks in repos:
+            seen[repo_name] = (stars, forks)
+        validators.extend(source_validators)
+        kind = cursor_kind(platform, source)
+        if newest and newest > cursors.get(kind, ""):
+            writer.submit(
+                "cursor", {"repo_id": CURSOR_REPO_ID, "kind": kind, "value": newest}
+            )
+
+    for repo_name, (stars, forks) in seen.items():
+        writer.submit(
+            "repo_seen",
+            {
+                "platform": platform,
+                "repo_name": repo_name,
+                "stars": stars,
+                "forks": forks,
+                "seen_at": now,
+            },
+        )
+    if full and None not in results:
+        writer.submit("repos_unseen", {"platform": platform, "before": now})
+        writer.submit(
+            "cursor", {"repo_id": CURSOR_REPO_ID, "kind": sweep_kind, "value": now}
+        )
+
+    sweep = "full" if full else "incremental"
+    DISCOVERED_REPOS.inc(len(seen), platform=platform, sweep=sweep)
+    print(
+        f"Stage 1: {platform} discovery ({sweep}): {len(seen)} repos "
+        f"from {len(sources)} source(s)."
+    )
+    if not await asyncio.to_thread(writer.flush):
+        for key, headers, next_url in validators:
+            cache.store(key, headers, next_url)
+    return seen
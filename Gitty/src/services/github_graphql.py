@@ -0,0 +1,101 @@
+import os
+
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH", "50"))
+
+REPO_STATS_FIELDS = """
+    nameWithOwner
+    stargazerCount
+    forkCount
+    openIssues: issues(states: OPEN) { totalCount }
+    closedIssues: issues(states: CLOSED) { totalCount }
+    openPRs: pullRequests(states: OPEN) { totalCount }
+    closedPRs: pullRequests(states: [CLOSED, MERGED]) { totalCount }
+    defaultBranchRef {
+      target { ... on Commit { history { totalCount } } }
+    }
+"""
+
+
+class GraphQLError(Exception):
+    pass
+
+
+async def post_query(client, query, variables=None):
+    """(data, errors); kısmi hata (ör. silinmiş repo) -> data içinde null alias"""
+    # Sadece sorgu (mutation yok) -> tekrar ve hedging güvenli
+    resp = await client.post(
+        GITHUB_GRAPHQL_URL,
+        json={"query": query, "variables": variables or {}},
+        idempotent=True,
+    )
+    resp.raise_for_status()
+    body = resp.json()
+    if body.get("data") is None:
+        raise GraphQLError(body.get("errors"))
+    return body["data"], body.get("errors") or []
+
+
+async def run_query(client, query, variables=None):
+    data, _ = await post_query(client, query, variables)
+    return data
+
+
+def build_stats_query(repo_names):
+    """Her repo için bir alias (r0, r1, ...) içeren tek sorgu + değişkenler"""
+    params, aliases, variables = [], [], {}
+    for i, full_name in enumerate(repo_names):
+        owner, name = full_name.split("/", 1)
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        aliases.append(
+            f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{{REPO_STATS_FIELDS}  }}"
+        )
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+    query = f"query({', '.join(params)}) {{\n" + "\n".join(aliases) + "\n}"
+    return query, variables
+
+
+def parse_repo_stats(node):
+    branch = node.get("defaultBranchRef") or {}
+    history = (branch.get("target") or {}).get("history") or {}
+    return {
+        "repo_name": node["nameWithOwner"],
+        "stars": node["stargazerCount"],
+        "forks": node["forkCount"],
+        "open_issues": node["openIssues"]["totalCount"],
+        "closed_issues": node["closedIssues"]["totalCount"],
+        "open_prs": node["openPRs"]["totalCount"],
+        "closed_prs": node["closedPRs"]["totalCount"],
+        "commits": history.get("totalCount", 0),
+    }
+
+
+async def fetch_repo_stats(client, repo_names):
+    """
+    Bir batch repo için yıldız/fork/issue/PR/commit sayıları, tek istekte.
+    Sonuçlar repo_names ile aynı sırada: sayılar, None (NOT_FOUND: repo yok)
+    ya da False (başka bir alias hatası, tekrar denenir).
+    Yeniden adlandırılan repo yeni nameWithOwner ile döner, eşleştirme sıraya göre yapılır.
+    """
+    if not repo_names:
+        return []
+    query, variables = build_stats_query(repo_names)
+    data, errors = await post_query(client, query, variables)
+    missing = {
+        error["path"][0]
+        for error in errors
+        if error.get("type") == "NOT_FOUND" and error.get("path")
+    }
+    results = []
+    for i in range(len(repo_names)):
+        node = data.get(f"r{i}")
+        if node:
+            results.append(parse_repo_stats(node))
+        else:
+            results.append(None if f"r{i}" in missing else False)
+    return results
+
+
+def chunked(items, size=GRAPHQL_BATCH_SIZE):
+    return [items[i : i + size] for i in range(0, len(items), size)]
@@ -1,11 +1,23 @@
 import asyncio
 import os
 import sqlite3
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from dotenv import load_dotenv
-from github import Github, GithubException
+from services.checkpoints import mark_checked
+from services.counters import (
+    github_commit_count,
+    github_commits_since,
+    github_issue_counts,
+    github_pr_counts,
+    incremental_commit_count,
+)
+from services.db_writer import fetch_error, submit_repo_record, writer
+from services.discovery import discover, parse_sources
+from services.github_graphql import GraphQLError, chunked, fetch_repo_stats
+from services.http_cache import ResponseCache, cache_key
+from services.http_client import REQUEST_ERRORS, HttpClient, HttpError
+from services.telemetry import REPOS_SYNCED, STAGE_SECONDS
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 dotenv_path = os.path.join(BASE_DIR, ".env")
@@ -20,6 +32,13 @@ else:
 DB_DIR = os.getenv("DB_DIR", "database")
 DB_NAME = os.getenv("DB_NAME", "git_flow.db")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+# "rest" (varsayılan) veya "graphql"
+GITHUB_SYNC_MODE = os.getenv("GITHUB_SYNC_MODE", "rest").lower()
+# "user" = token sahibinin erişebildiği repolar, "user:<ad>", "org:<ad>"; virgülle
+GITHUB_DISCOVERY_SOURCES = parse_sources(
+    os.getenv("GITHUB_DISCOVERY_SOURCES", "user"), ("user", "org")
+)
 FINAL_DB_DIR = os.path.join(BASE_DIR, DB_DIR.replace("../", ""))
 DB_PATH = os.path.join(FINAL_DB_DIR, DB_NAME)
 
@@ -28,153 +47,320 @@ def get_db_connection():
     return sqlite3.connect(DB_PATH)
 
 
-def process_single_repo(repo_data):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    repo_name, stars, forks = repo_data
+def github_headers():
+    return {
+        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github+json",
+    }
+
+
+async def probe_repo_endpoint(client, cache, r_name, endpoint, params):
+    """
+    Repo alt listesinin en güncel elemanını koşullu olarak ister.
+    304 -> None (değişiklik yok), aksi halde (cache_key, headers).
+    Son tam sayım RECOUNT_AGE'den eskiyse koşulsuz istenir (silme probe'u değiştirmez).
+    """
+    url = f"{GITHUB_API_URL}/repos/{r_name}/{endpoint}"
+    if cache is not None and cache.expired(cache_key(url, params)):
+        cache = None
+    resp, key = await client.conditional_get(url, params, cache=cache)
+    if resp.status == 304:
+        return None
+    resp.raise_for_status()
+    return key, resp.headers
+
+
+def source_url(source):
+    kind, name = source
+    if kind == "org":
+        return f"{GITHUB_API_URL}/orgs/{name}/repos"
+    if name:
+        return f"{GITHUB_API_URL}/users/{name}/repos"
+    return f"{GITHUB_API_URL}/user/repos"
+
+
+async def list_source_repos(client, cache, source, since):
+    """
+    Kaynağın repolarını en son güncellenenden geriye doğru gezer, imleçten
+    (since) eski bir repoya gelince durur; since=None tam listedir.
+    (repolar, en yeni updated_at, ilk sayfanın doğrulayıcıları) döner.
+    """
+    url = source_url(source)
+    params = {"sort": "updated", "direction": "desc", "per_page": 100}
+    if source[0] == "org":
+        params["type"] = "all"
+    # Sadece ilk sayfa koşullu: 304 = imleçten beri hiçbir repo güncellenmedi
+    resp, key = await client.conditional_get(
+        url, params, cache=cache if since else None
+    )
+    if resp.status == 304:
+        return [], None, []
+    resp.raise_for_status()
+    validators = [(key, resp.headers, None)]
+    repos, newest = [], None
+    while True:
+        for r in resp.json():
+            if since and r["updated_at"] < since:
+                return repos, newest, validators
+            newest = max(newest or r["updated_at"], r["updated_at"])
+            repos.append((r["full_name"], r["stargazers_count"], r["forks_count"]))
+        url = resp.next_url()
+        if not url:
+            return repos, newest, validators
+        resp = await client.get(url)
+        resp.raise_for_status()
+
+
+async def fetch_repo_meta(r_name, client, cache):
+    """Repo nesnesi tek koşullu istekle: (probe, {yıldız, fork}); 304 -> (None, {})"""
     try:
-        cursor.execute("SELECT id FROM Repositories WHERE repo_name = ?", (repo_name,))
-        exists = cursor.fetchone()
-        if not exists:
-            cursor.execute(
-                "INSERT INTO Repositories (platform, repo_name, star_count, fork_count) VALUES (?, ?, ?, ?)",
-                ("GitHub", repo_name, stars, forks),
-            )
-        else:
-            cursor.execute(
-                "UPDATE Repositories SET star_count = ?, fork_count = ? WHERE id = ?",
-                (stars, forks, exists[0]),
-            )
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def process_single_issue(repo_info, g):
-    r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
+        resp, key = await client.conditional_get(
+            f"{GITHUB_API_URL}/repos/{r_name}", cache=cache
+        )
+        if resp.status == 304:
+            return None, {}
+        resp.raise_for_status()
+        data = resp.json()
+        return (key, resp.headers), {
+            "stars": data["stargazers_count"],
+            "forks": data["forks_count"],
+        }
+    except HttpError as e:
+        if e.status == 404:
+            print(f"Warning: {r_name} not found (404), marking inactive.")
+            return None, None
+        print(f"Warning: {r_name} Repo error ({e.status}).")
+        return fetch_error(e)
+    except REQUEST_ERRORS as e:
+        print(f"Warning: {r_name} Repo request failed.")
+        return fetch_error(e)
+
+
+async def fetch_issue_counts(r_name, client, cache):
     try:
-        repo = g.get_repo(r_name)
-
-        open_issues_list = repo.get_issues(state="open")
-        closed_issues_list = repo.get_issues(state="closed")
-
-        o_issue = sum(1 for i in open_issues_list if i.pull_request is None)
-        c_issue = sum(1 for i in closed_issues_list if i.pull_request is None)
+        probe = await probe_repo_endpoint(
+            client,
+            cache,
+            r_name,
+            "issues",
+            {"state": "all", "sort": "updated", "direction": "desc", "per_page": 1},
+        )
+        if probe is None:
+            return None, {}
 
-        cursor.execute("SELECT repo_id FROM Repo_Stats WHERE repo_id = ?", (r_id,))
-        if cursor.fetchone():
-            cursor.execute(
-                "UPDATE Repo_Stats SET open_issues = ?, closed_issues = ? WHERE repo_id = ?",
-                (o_issue, c_issue, r_id),
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO Repo_Stats (repo_id, open_issues, closed_issues, total_commits) VALUES (?, ?, ?, 0)",
-                (r_id, o_issue, c_issue),
-            )
-        conn.commit()
-    except GithubException:
+        o_issue, c_issue = await github_issue_counts(client, r_name)
+        return probe, {"open_issues": o_issue, "closed_issues": c_issue}
+    except (GraphQLError, *REQUEST_ERRORS) as e:
         print(f"Warning: {r_name} Issue error (404/403).")
-    finally:
-        conn.close()
+        return fetch_error(e)
 
 
-def process_single_commit(repo_info, g):
+async def fetch_commit_count(repo_info, client, cache, heads):
+    """
+    Varsayılan dalın son commit'i koşullu istenir; head değiştiyse sayı
+    "commits" imlecinden (sha:sayı) compare ile artımlı güncellenir.
+    """
     r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        repo = g.get_repo(r_name)
-        count = repo.get_commits().totalCount
-        cursor.execute(
-            "UPDATE Repo_Stats SET total_commits = ? WHERE repo_id = ?", (count, r_id)
+        resp, key = await client.conditional_get(
+            f"{GITHUB_API_URL}/repos/{r_name}/commits", {"per_page": 1}, cache=cache
+        )
+        if resp.status == 304:
+            return None, {}
+        resp.raise_for_status()
+        latest = resp.json()
+        if not latest:
+            return (key, resp.headers), {"commits": 0}
+
+        head = latest[0]["sha"]
+        count = await incremental_commit_count(
+            client,
+            r_name,
+            "GitHub",
+            heads.get(r_id),
+            head,
+            github_commits_since,
+            github_commit_count,
         )
-        conn.commit()
-    except GithubException:
+        cursor = f"{head}:{count}"
+        if cursor != heads.get(r_id):
+            writer.submit(
+                "cursor", {"repo_id": r_id, "kind": "commits", "value": cursor}
+            )
+        return (key, resp.headers), {"commits": count}
+    except REQUEST_ERRORS as e:
         print(f"Warning: {r_name} Commit error (Empty repo).")
-    finally:
-        conn.close()
+        return fetch_error(e)
 
 
-def process_single_pr(repo_info, g):
-    r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def fetch_pr_counts(r_name, client, cache):
     try:
-        repo = g.get_repo(r_name)
+        probe = await probe_repo_endpoint(
+            client,
+            cache,
+            r_name,
+            "pulls",
+            {"state": "all", "sort": "updated", "direction": "desc", "per_page": 1},
+        )
+        if probe is None:
+            return None, {}
 
-        open_prs_list = repo.get_pulls(state="open")
-        closed_prs_list = repo.get_pulls(state="closed")
+        o_pr, c_pr = await github_pr_counts(client, r_name)
+        return probe, {"open_prs": o_pr, "closed_prs": c_pr}
+    except REQUEST_ERRORS as e:
+        print(f"Warning: {r_name} PR error (404/403).")
+        return fetch_error(e)
 
-        o_pr = open_prs_list.totalCount
-        c_pr = closed_prs_list.totalCount
 
-        cursor.execute("SELECT repo_id FROM Repo_Stats WHERE repo_id = ?", (r_id,))
-        if cursor.fetchone():
-            cursor.execute(
-                "UPDATE Repo_Stats SET open_prs = ?, closed_prs = ? WHERE repo_id = ?",
-                (o_pr, c_pr, r_id),
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO Repo_Stats (repo_id, open_prs, closed_prs, total_commits, open_issues, closed_issues) "
-                "VALUES (?, ?, ?, 0, 0, 0)",
-                (r_id, o_pr, c_pr),
-            )
-        conn.commit()
-    except GithubException:
-        print(f"Warning: {r_name} PR error (404/403).")
-    finally:
-        conn.close()
+async def process_repo(repo_info, client, cache, heads):
+    """
+    Bir repo için tüm metrikler tek görevde: repo nesnesi bir kez çekilir,
+    issue/commit/PR probe'ları paralel çalışır, sonuç tek "repo_full" kaydı olur.
+    Kaydedilecek doğrulayıcıları (probe) döner.
+    """
+    r_id, r_name = repo_info
+    results = await asyncio.gather(
+        fetch_repo_meta(r_name, client, cache),
+        fetch_issue_counts(r_name, client, cache),
+        fetch_commit_count(repo_info, client, cache, heads),
+        fetch_pr_counts(r_name, client, cache),
+    )
+    probes, ok = submit_repo_record(r_id, results)
+    # Geçici hatada kontrol edilmemiş sayılır: döngü sonunda taban aralıkla planlanır
+    if ok:
+        mark_checked(r_id)
+    return probes
 
 
-async def run_parallel(func, items, *args):
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        tasks = [loop.run_in_executor(executor, func, item, *args) for item in items]
-        await asyncio.gather(*tasks)
+async def process_graphql_batch(batch, client):
+    """Tek GraphQL isteğiyle bir batch (id, repo); Repositories + Repo_Stats kayıtları"""
+    try:
+        records = await fetch_repo_stats(client, [r_name for _, r_name in batch])
+    except Exception as e:
+        print(f"Warning: GraphQL batch error ({len(batch)} repos): {e}")
+        return
 
+    # REST yolu gibi repo id'sine yazılır: yeniden adlandırılan repo ikinci satır açmaz
+    for (r_id, r_name), rec in zip(batch, records):
+        if rec is False:
+            # Kontrol edilmemiş sayılır: döngü sonunda taban aralıkla planlanır
+            continue
+        if rec is None:
+            print(f"Warning: {r_name} not found (GraphQL), marking inactive.")
+            writer.submit("repo_inactive", {"repo_id": r_id})
+        else:
+            writer.submit("repo_full", {"repo_id": r_id, **rec})
+        mark_checked(r_id)
 
-async def main():
-    if not GITHUB_TOKEN or not os.path.exists(DB_PATH):
-        print("Error: Token or DB not found.")
+
+async def flush_stage(cache, probes):
+    """Aşamanın kayıtlarını commit eder; yazım başarılıysa doğrulayıcıları saklar"""
+    failed = await asyncio.to_thread(writer.flush)
+    if failed:
+        print(f"Warning: {failed} DB write(s) failed, ETag cache not updated.")
         return
+    for probe in probes:
+        if probe:
+            cache.store(*probe)
+    await asyncio.to_thread(cache.persist)
 
-    g = Github(GITHUB_TOKEN, timeout=15, retry=None)
 
-    print("Stage 1: Synchronizing repositories...")
-    user_repos = [
-        (r.full_name, r.stargazers_count, r.forks_count)
-        for r in g.get_user().get_repos()
-    ]
-    await run_parallel(process_single_repo, user_repos)
+async def run_parallel(func, items, *args):
+    """Aynı event loop üzerinde; eşzamanlılığı HttpClient'ın kota denetleyicisi ayarlar"""
+    return await asyncio.gather(*(func(item, *args) for item in items))
 
-    conn = get_db_connection()
-    db_repos = conn.execute("SELECT id, repo_name FROM Repositories").fetchall()
-    conn.close()
 
-    print("Stage 2: Fetching issue data in parallel...")
-    await run_parallel(process_single_issue, db_repos, g)
+def load_cursors(kind):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT repo_id, value FROM Sync_Cursors WHERE kind = ?", (kind,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
 
-    print("Stage 3: Fetching commit data in parallel...")
-    await run_parallel(process_single_commit, db_repos, g)
 
-    print("Stage 4: Fetching pull request data in parallel...")
-    await run_parallel(process_single_pr, db_repos, g)
+def load_repos(repo_ids=None):
+    """DB'deki GitHub repoları; repo_ids verilirse sadece onlar"""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT id, repo_name FROM Repositories WHERE platform='GitHub' AND active = 1"
+        ).fetchall()
+    finally:
+        conn.close()
+    if repo_ids is None:
+        return rows
+    wanted = set(repo_ids)
+    return [row for row in rows if row[0] in wanted]
+
+
+async def discover_repos(client, cache):
+    """Stage 1: yapılandırılmış kaynaklardaki yeni/güncellenen repolar"""
+    await discover(
+        "GitHub",
+        GITHUB_DISCOVERY_SOURCES,
+        lambda source, since: list_source_repos(client, cache, source, since),
+        cache,
+    )
 
-    print("Operation Successful: Repositories, Issues, and Commits synchronized.")
 
+async def sync_github(http, mode=None, repo_ids=None, discover=True):
+    """
+    Paylaşılan HttpClient ile GitHub senkronu (main.py'nin event loop'unda).
+    discover: repo listesini de yenile; repo_ids: sadece bu repoların
+    istatistiklerini çek (None = hepsi, boş liste = hiçbiri).
+    """
+    if not GITHUB_TOKEN or not os.path.exists(DB_PATH):
+        print("Error: Token or DB not found.")
+        return
 
-def sync_github_data():
-    """Main.py'nin thread içinde güvenle çağırabilmesi için giriş noktası"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    mode = mode or GITHUB_SYNC_MODE
+    client = http.bind(github_headers())
+    cache = ResponseCache()
     try:
-        loop.run_until_complete(main())
+        if discover:
+            with STAGE_SECONDS.time(platform="GitHub", stage="discovery"):
+                await discover_repos(client, cache)
+
+        db_repos = load_repos(repo_ids)
+        if not db_repos:
+            return
+        REPOS_SYNCED.inc(len(db_repos), platform="GitHub")
+
+        if mode == "graphql":
+            batches = chunked(db_repos)
+            print(
+                f"Stage 2: Fetching stats for {len(db_repos)} repos in {len(batches)} GraphQL batches..."
+            )
+            with STAGE_SECONDS.time(platform="GitHub", stage="stats"):
+                await run_parallel(process_graphql_batch, batches, client)
+                await asyncio.to_thread(writer.flush)
+            print(
+                "Operation Successful: Repositories and stats synchronized via GraphQL."
+            )
+            return
+
+        print(f"Stage 2: Fetching repo stats per repo... ({len(db_repos)} repos)")
+        with STAGE_SECONDS.time(platform="GitHub", stage="stats"):
+            heads = load_cursors("commits")
+            results = await run_parallel(process_repo, db_repos, client, cache, heads)
+            await flush_stage(cache, [probe for probes in results for probe in probes])
+        print("Operation Successful: Repositories, Issues, and Commits synchronized.")
     finally:
-        loop.close()
+        cache.close()
+
+
+async def main(mode=None):
+    async with HttpClient() as http:
+        await sync_github(http, mode)
+        http.rate_limits.log_budget("  ")
+
+
+def sync_github_data(mode=None):
+    """Tek başına (python github_sync.py) çalıştırma için giriş noktası"""
+    asyncio.run(main(mode))
 
 
 if __name__ == "__main__":
@@ -1,11 +1,26 @@
 import asyncio
 import os
 import sqlite3
-from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import quote
 
-import gitlab
 from dotenv import load_dotenv
+from services.checkpoints import mark_checked
+from services.counters import (
+    gitlab_commit_count,
+    gitlab_commits_since,
+    gitlab_issue_counts,
+    gitlab_mr_counts,
+    incremental_commit_count,
+)
+from services.db_writer import fetch_error, submit_repo_record, writer
+from services.discovery import discover, parse_sources
+from services.http_cache import ResponseCache, cache_key
+from services.http_client import HttpClient, HttpError
+from services.outbox import enqueue_pipeline_transition
+from services.telemetry import REPOS_SYNCED, STAGE_SECONDS
 
 # Mimari Gereği Dizin Yapılandırması
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -21,7 +36,13 @@ else:
 DB_DIR = os.getenv("DB_DIR", "database")
 DB_NAME = os.getenv("DB_NAME", "git_flow.db")
 GITLAB_TOKEN = os.getenv("GITLAB_TOKEN")
-GITLAB_URL = os.getenv("GITLAB_URL", "https://gitlab.com")
+GITLAB_URL = os.getenv("GITLAB_URL", "https://gitlab.com").rstrip("/")
+ZERO_SHA = "0" * 40
+# "owned", "membership", "group:<yol>" (alt gruplar dahil), "user:<ad>"; virgülle
+GITLAB_DISCOVERY_SOURCES = parse_sources(
+    os.getenv("GITLAB_DISCOVERY_SOURCES", "owned"),
+    ("owned", "membership", "group", "user"),
+)
 
 FINAL_DB_DIR = os.path.join(BASE_DIR, DB_DIR.replace("../", ""))
 DB_PATH = os.path.join(FINAL_DB_DIR, DB_NAME)
@@ -31,184 +52,475 @@ def get_db_connection():
     return sqlite3.connect(DB_PATH)
 
 
-def process_gitlab_repo(repo_data):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    repo_name, stars, forks = repo_data
-    try:
-        cursor.execute("SELECT id FROM Repositories WHERE repo_name = ?", (repo_name,))
-        exists = cursor.fetchone()
-        if not exists:
-            cursor.execute(
-                "INSERT INTO Repositories (platform, repo_name, star_count, fork_count) VALUES (?, ?, ?, ?)",
-                ("GitLab", repo_name, stars, forks),
-            )
-        else:
-            cursor.execute(
-                "UPDATE Repositories SET star_count = ?, fork_count = ? WHERE id = ?",
-                (stars, forks, exists[0]),
+def gitlab_headers():
+    return {"PRIVATE-TOKEN": GITLAB_TOKEN}
+
+
+def project_url(r_name, endpoint):
+    return f"{GITLAB_URL}/api/v4/projects/{quote(r_name, safe='')}/{endpoint}"
+
+
+async def probe_project_endpoint(client, cache, r_name, endpoint, params):
+    """
+    Proje alt listesini koşullu olarak ister.
+    304 -> None (değişiklik yok), aksi halde (cache_key, headers).
+    Son tam sayım RECOUNT_AGE'den eskiyse koşulsuz istenir (silme probe'u değiştirmez).
+    """
+    url = project_url(r_name, endpoint)
+    if cache is not None and cache.expired(cache_key(url, params)):
+        cache = None
+    resp, key = await client.conditional_get(url, params, cache=cache)
+    if resp.status == 304:
+        return None
+    resp.raise_for_status()
+    return key, resp.headers
+
+
+def source_request(source):
+    """Kaynak -> (liste adresi, kaynağa özel parametreler)"""
+    kind, name = source
+    if kind == "group":
+        return f"{GITLAB_URL}/api/v4/groups/{quote(name, safe='')}/projects", {
+            "include_subgroups": "true"
+        }
+    if kind == "user":
+        return f"{GITLAB_URL}/api/v4/users/{quote(name, safe='')}/projects", {}
+    return f"{GITLAB_URL}/api/v4/projects", {kind: "true"}
+
+
+async def list_source_projects(client, cache, source, since):
+    """
+    Kaynağın projelerini son aktiviteye göre yeniden eskiye gezer;
+    last_activity_after ile imleçten (since) eskiler sunucuda elenir.
+    (projeler, en yeni last_activity_at, ilk sayfanın doğrulayıcıları) döner.
+    """
+    url, params = source_request(source)
+    params.update({"order_by": "last_activity_at", "sort": "desc", "per_page": 100})
+    if since:
+        params["last_activity_after"] = since
+    resp, key = await client.conditional_get(
+        url, params, cache=cache if since else None
+    )
+    if resp.status == 304:
+        return [], None, []
+    resp.raise_for_status()
+    validators = [(key, resp.headers, None)]
+    projects, newest = [], None
+    while True:
+        for p in resp.json():
+            # Filtreyi desteklemeyen uç noktalar için istemci tarafında da durulur
+            if since and p["last_activity_at"] < since:
+                return projects, newest, validators
+            newest = max(newest or p["last_activity_at"], p["last_activity_at"])
+            projects.append(
+                (p["path_with_namespace"], p["star_count"], p["forks_count"])
             )
-        conn.commit()
-    finally:
-        conn.close()
+        url = resp.next_url()
+        if not url:
+            return projects, newest, validators
+        resp = await client.get(url)
+        resp.raise_for_status()
 
 
-def process_gitlab_issues(repo_info, gl):
-    r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def fetch_project_meta(r_name, client, cache):
+    """Proje nesnesi tek koşullu istekle: (probe, {yıldız, fork}); 304 -> (None, {})"""
     try:
-        project = gl.projects.get(r_name)
-        # Yeni versiyonlarda get_all=True parametresi veya len check kullanılır
-        o_issue = len(project.issues.list(state="opened", get_all=True))
-        c_issue = len(project.issues.list(state="closed", get_all=True))
-
-        cursor.execute("SELECT repo_id FROM Repo_Stats WHERE repo_id = ?", (r_id,))
-        if cursor.fetchone():
-            cursor.execute(
-                "UPDATE Repo_Stats SET open_issues = ?, closed_issues = ? WHERE repo_id = ?",
-                (o_issue, c_issue, r_id),
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO Repo_Stats (repo_id, open_issues, closed_issues, total_commits) VALUES (?, ?, ?, 0)",
-                (r_id, o_issue, c_issue),
+        resp, key = await client.conditional_get(
+            f"{GITLAB_URL}/api/v4/projects/{quote(r_name, safe='')}", cache=cache
+        )
+        if resp.status == 304:
+            return None, {}
+        resp.raise_for_status()
+        data = resp.json()
+        return (key, resp.headers), {
+            "stars": data["star_count"],
+            "forks": data["forks_count"],
+        }
+    except HttpError as e:
+        if e.status == 404:
+            print(
+                f"Warning: GitLab project {r_name} not found (404), marking inactive."
             )
-        conn.commit()
+            return None, None
+        print(f"Warning: GitLab Project error on {r_name}: {e}")
+        return fetch_error(e)
+    except Exception as e:
+        print(f"Warning: GitLab Project error on {r_name}: {e}")
+        return fetch_error(e)
+
+
+async def fetch_gitlab_issues(r_name, client, cache):
+    try:
+        probe = await probe_project_endpoint(
+            client,
+            cache,
+            r_name,
+            "issues",
+            {"order_by": "updated_at", "sort": "desc", "per_page": 1},
+        )
+        if probe is None:
+            return None, {}
+
+        # Listeyi indirmek yerine issues_statistics sayaçları
+        o_issue, c_issue = await gitlab_issue_counts(client, r_name)
+        return probe, {"open_issues": o_issue, "closed_issues": c_issue}
     except Exception as e:
         print(f"Warning: GitLab Issue error on {r_name}: {e}")
-    finally:
-        conn.close()
+        return fetch_error(e)
 
 
-def process_gitlab_commits(repo_info, gl):
-    """'list' object has no attribute 'total' hatası için düzeltildi."""
+async def fetch_gitlab_commits(repo_info, client, cache, heads):
+    """
+    Varsayılan dalın son commit'i koşullu istenir; head değiştiyse sayı
+    "commits" imlecinden (sha:sayı) aralık sayımıyla artımlı güncellenir.
+    """
     r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        project = gl.projects.get(r_name)
-        # GitLab'da commit sayısını almanın en performanslı yolu HEAD isteği veya sayfalama bilgisidir
-        # list() metodu 'get_all=False' iken python-gitlab nesnesinde total bilgisini barındırır
-        commits = project.commits.list(all=False, lazy=True)
-        # total_count, python-gitlab manager üzerinden çekilir
-        count = (
-            commits.total
-            if hasattr(commits, "total")
-            else len(project.commits.list(get_all=True))
+        resp, key = await client.conditional_get(
+            project_url(r_name, "repository/commits"), {"per_page": 1}, cache=cache
         )
-
-        cursor.execute(
-            "UPDATE Repo_Stats SET total_commits = ? WHERE repo_id = ?", (count, r_id)
+        if resp.status == 304:
+            return None, {}
+        resp.raise_for_status()
+        latest = resp.json()
+        if not latest:
+            return (key, resp.headers), {"commits": 0}
+
+        head = latest[0]["id"]
+        # Tam sayım: X-Total başlığı, yoksa proje istatistiklerindeki commit_count
+        count = await incremental_commit_count(
+            client,
+            r_name,
+            "GitLab",
+            heads.get(r_id),
+            head,
+            gitlab_commits_since,
+            gitlab_commit_count,
         )
-        conn.commit()
+        cursor = f"{head}:{count}"
+        if cursor != heads.get(r_id):
+            writer.submit(
+                "cursor", {"repo_id": r_id, "kind": "commits", "value": cursor}
+            )
+        return (key, resp.headers), {"commits": count}
     except Exception as e:
         print(f"Warning: GitLab Commit error on {r_name}: {e}")
-    finally:
-        conn.close()
+        return fetch_error(e)
 
 
-def process_gitlab_mrs(repo_info, gl):
-    r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def fetch_gitlab_mrs(r_name, client, cache):
     try:
-        project = gl.projects.get(r_name)
-        o_mr = len(project.mergerequests.list(state="opened", get_all=True))
-        c_mr = len(project.mergerequests.list(state="merged", get_all=True)) + len(
-            project.mergerequests.list(state="closed", get_all=True)
+        probe = await probe_project_endpoint(
+            client,
+            cache,
+            r_name,
+            "merge_requests",
+            {"order_by": "updated_at", "sort": "desc", "per_page": 1},
         )
+        if probe is None:
+            return None, {}
 
-        cursor.execute("SELECT repo_id FROM Repo_Stats WHERE repo_id = ?", (r_id,))
-        if cursor.fetchone():
-            cursor.execute(
-                "UPDATE Repo_Stats SET open_prs = ?, closed_prs = ? WHERE repo_id = ?",
-                (o_mr, c_mr, r_id),
-            )
-        conn.commit()
+        # per_page=1 isteklerinin X-Total başlıkları
+        o_mr, c_mr = await gitlab_mr_counts(client, r_name)
+        return probe, {"open_prs": o_mr, "closed_prs": c_mr}
     except Exception as e:
         print(f"Warning: GitLab MR error on {r_name}: {e}")
+        return fetch_error(e)
+
+
+async def process_gitlab_project(repo_info, client, cache, cursors, heads):
+    """
+    Bir proje için tüm metrikler + pipeline'lar tek görevde, istekler paralel.
+    İstatistikler tek "repo_full" kaydı olur; (probe'lar, pipeline geçişleri) döner.
+    """
+    r_id, r_name = repo_info
+    *results, pipelines = await asyncio.gather(
+        fetch_project_meta(r_name, client, cache),
+        fetch_gitlab_issues(r_name, client, cache),
+        fetch_gitlab_commits(repo_info, client, cache, heads),
+        fetch_gitlab_mrs(r_name, client, cache),
+        process_gitlab_pipelines(repo_info, client, cache, cursors),
+    )
+    probes, ok = submit_repo_record(r_id, results)
+    # Geçici hatada kontrol edilmemiş sayılır: döngü sonunda taban aralıkla planlanır
+    if ok and pipelines is not False:
+        mark_checked(r_id)
+    if not pipelines:
+        return probes, []
+    pipeline_probe, transitions = pipelines
+    if pipeline_probe:
+        probes.append(pipeline_probe)
+    return probes, transitions
+
+
+def load_cursors(kind):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT repo_id, value FROM Sync_Cursors WHERE kind = ?", (kind,)
+        ).fetchall()
     finally:
         conn.close()
+    return dict(rows)
+
+
+async def fetch_pipelines(client, cache, r_name, updated_after):
+    """
+    updated_after imlecinden sonra oluşan/güncellenen pipeline'lar.
+    İmleç yoksa (ilk senkron) sadece son 5 pipeline alınır.
+    304 -> None
+    """
+    if updated_after:
+        params = {
+            "updated_after": updated_after,
+            "order_by": "updated_at",
+            "sort": "asc",
+            "per_page": 100,
+        }
+    else:
+        params = {"order_by": "id", "sort": "desc", "per_page": 5}
+
+    resp, key = await client.conditional_get(
+        project_url(r_name, "pipelines"), params, cache=cache
+    )
+    if resp.status == 304:
+        return None
+    resp.raise_for_status()
+    pipelines = resp.json()
+    probe = (key, resp.headers)
+
+    next_url = resp.next_url() if updated_after else None
+    while next_url:
+        resp = await client.get(next_url)
+        resp.raise_for_status()
+        pipelines.extend(resp.json())
+        next_url = resp.next_url()
+    return probe, pipelines
+
+
+def server_time(headers):
+    """Yanıtın Date başlığı (yoksa yerel saat), updated_after için ISO 8601"""
+    try:
+        now = parsedate_to_datetime(headers["Date"])
+    except (KeyError, TypeError, ValueError):
+        now = datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
-def process_gitlab_pipelines(repo_info, gl):
+async def process_gitlab_pipelines(repo_info, client, cache, cursors):
+    """
+    Artımlı pipeline senkronu; (probe, durum geçişleri) döner, 304 -> None,
+    hata -> False. Geçiş bildirimleri outbox'a pipeline satırıyla birlikte yazılır.
+    """
     r_id, r_name = repo_info
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        project = gl.projects.get(r_name)
-        # Mevcut mimarideki Pipelines tablosuna son 5 tanesini ekler
-        pipelines = project.pipelines.list(page=1, per_page=5)
+        updated_after = cursors.get(r_id)
+        fetched = await fetch_pipelines(client, cache, r_name, updated_after)
+        if fetched is None:
+            return None
+        probe, pipelines = fetched
+        if not pipelines:
+            # Henüz pipeline'ı olmayan proje: imleç yine de yazılır, yoksa ilk
+            # pipeline'lar "ilk senkron" sayılıp bildirimsiz kaydedilirdi
+            if not updated_after:
+                writer.submit(
+                    "cursor",
+                    {
+                        "repo_id": r_id,
+                        "kind": "pipelines",
+                        "value": server_time(probe[1]),
+                    },
+                )
+            return probe, []
+
+        conn = get_db_connection()
+        try:
+            ids = [p["id"] for p in pipelines]
+            known = dict(
+                conn.execute(
+                    f"SELECT pipeline_id, status FROM Pipelines "
+                    f"WHERE repo_id = ? AND pipeline_id IN ({','.join('?' * len(ids))})",
+                    (r_id, *ids),
+                ).fetchall()
+            )
+        finally:
+            conn.close()
 
+        transitions = []
         for pipe in pipelines:
-            # Tekrar eden pipeline eklememek için kontrol
-            cursor.execute(
-                "INSERT INTO Pipelines (repo_id, status, created_at) VALUES (?, ?, ?)",
-                (r_id, pipe.status, pipe.created_at),
+            old_status = known.get(pipe["id"])
+            if old_status == pipe["status"]:
+                continue
+            record = {
+                "repo_id": r_id,
+                "pipeline_id": pipe["id"],
+                "status": pipe["status"],
+                "ref": pipe.get("ref"),
+                "created_at": pipe.get("created_at"),
+                "updated_at": pipe.get("updated_at"),
+            }
+            # İlk senkron sadece tabloyu doldurur, bildirim üretmez
+            if not updated_after:
+                writer.submit("pipeline", record)
+                continue
+            transition = {
+                "repo_id": r_id,
+                "repo_name": r_name,
+                "pipeline_id": pipe["id"],
+                "ref": pipe.get("ref"),
+                "old_status": old_status,
+                "new_status": pipe["status"],
+                "web_url": pipe.get("web_url"),
+            }
+            enqueue_pipeline_transition(record, transition)
+            transitions.append(transition)
+
+        latest = max(p.get("updated_at") or "" for p in pipelines)
+        if latest and latest != updated_after:
+            writer.submit(
+                "cursor", {"repo_id": r_id, "kind": "pipelines", "value": latest}
             )
-        conn.commit()
+        return probe, transitions
     except Exception as e:
         print(f"Warning: GitLab Pipeline error on {r_name}: {e}")
-    finally:
-        conn.close()
+        return False
 
 
-async def run_parallel(func, items, *args):
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        tasks = [loop.run_in_executor(executor, func, item, *args) for item in items]
-        await asyncio.gather(*tasks)
+async def flush_stage(cache, probes):
+    """Aşamanın kayıtlarını commit eder; yazım başarılıysa doğrulayıcıları saklar"""
+    failed = await asyncio.to_thread(writer.flush)
+    if failed:
+        print(f"Warning: {failed} DB write(s) failed, ETag cache not updated.")
+        return
+    for probe in probes:
+        if probe:
+            cache.store(*probe)
+    await asyncio.to_thread(cache.persist)
 
 
-async def main():
-    if not GITLAB_TOKEN or not os.path.exists(DB_PATH):
-        print("Error: GitLab Token or DB not found.")
-        return
+async def run_parallel(func, items, *args):
+    """Aynı event loop üzerinde; eşzamanlılığı HttpClient'ın kota denetleyicisi ayarlar"""
+    return await asyncio.gather(*(func(item, *args) for item in items))
 
-    # Sürüm 5.0.0+ ve 8.0.0 için uyumlu bağlantı
-    gl = gitlab.Gitlab(GITLAB_URL, private_token=GITLAB_TOKEN)
-    gl.auth()
 
-    print("Stage 1: Synchronizing GitLab repositories...")
-    # 'owned=True' sadece sizin olan projeleri çeker
-    projects = gl.projects.list(owned=True, get_all=True)
-    user_projects = [
-        (p.path_with_namespace, p.star_count, p.forks_count) for p in projects
+async def check_push_ancestry(payload, client):
+    """
+    GitLab push hook'u GitHub'daki gibi "forced" taşımaz: eski head yeni head'in
+    atası değilse (gitlab_commits_since ile aynı kontrol) forced=True eklenir.
+    """
+    project = payload.get("project") or {}
+    if payload.get("ref") != f"refs/heads/{project.get('default_branch')}":
+        return
+    before, after = payload.get("before"), payload.get("after")
+    # Dal oluşturma/silme: sıfır sha, aralık sayılamaz
+    if not before or not after or ZERO_SHA in (before, after):
+        payload["forced"] = True
+        return
+    r_name = project.get("path_with_namespace")
+    try:
+        added = await gitlab_commits_since(client, r_name, before, after)
+    except Exception as e:
+        print(f"Warning: GitLab push check error on {r_name}: {e}")
+        added = None
+    payload["forced"] = added is None
+
+
+async def mark_forced_pushes(http, events):
+    """Webhook olaylarındaki GitLab push'larını uygulanmadan önce işaretler"""
+    client = http.bind(gitlab_headers())
+    pushes = [
+        payload
+        for platform, event, payload in events
+        if platform == "GitLab" and event == "Push Hook"
     ]
-    await run_parallel(process_gitlab_repo, user_projects)
+    await run_parallel(check_push_ancestry, pushes, client)
+
 
+def load_repos(repo_ids=None):
+    """DB'deki GitLab repoları; repo_ids verilirse sadece onlar"""
     conn = get_db_connection()
-    db_repos = conn.execute(
-        "SELECT id, repo_name FROM Repositories WHERE platform='GitLab'"
-    ).fetchall()
-    conn.close()
+    try:
+        rows = conn.execute(
+            "SELECT id, repo_name FROM Repositories WHERE platform='GitLab' AND active = 1"
+        ).fetchall()
+    finally:
+        conn.close()
+    if repo_ids is None:
+        return rows
+    wanted = set(repo_ids)
+    return [row for row in rows if row[0] in wanted]
+
+
+async def discover_projects(client, cache):
+    """Stage 1: token doğrulaması + kaynaklardaki yeni/aktif projeler"""
+    # Token doğrulaması (eski gl.auth() karşılığı)
+    resp = await client.get(f"{GITLAB_URL}/api/v4/user")
+    resp.raise_for_status()
+
+    await discover(
+        "GitLab",
+        GITLAB_DISCOVERY_SOURCES,
+        lambda source, since: list_source_projects(client, cache, source, since),
+        cache,
+    )
 
-    print("Stage 2: Fetching GitLab issues...")
-    await run_parallel(process_gitlab_issues, db_repos, gl)
 
-    print("Stage 3: Fetching GitLab commits...")
-    await run_parallel(process_gitlab_commits, db_repos, gl)
+async def sync_gitlab(http, repo_ids=None, discover=True):
+    """
+    Paylaşılan HttpClient ile GitLab senkronu; pipeline durum geçişlerini döner.
+    discover: proje listesini de yenile; repo_ids: sadece bu projelerin
+    istatistiklerini çek (None = hepsi, boş liste = hiçbiri).
+    """
+    if not GITLAB_TOKEN or not os.path.exists(DB_PATH):
+        print("Error: GitLab Token or DB not found.")
+        return []
 
-    print("Stage 4: Fetching GitLab Merge Requests...")
-    await run_parallel(process_gitlab_mrs, db_repos, gl)
+    client = http.bind(gitlab_headers())
+    cache = ResponseCache()
+    transitions = []
+    try:
+        if discover:
+            with STAGE_SECONDS.time(platform="GitLab", stage="discovery"):
+                await discover_projects(client, cache)
+
+        db_repos = load_repos(repo_ids)
+        if not db_repos:
+            return transitions
+        REPOS_SYNCED.inc(len(db_repos), platform="GitLab")
+
+        print(f"Stage 2: Fetching GitLab stats per project... ({len(db_repos)} repos)")
+        with STAGE_SECONDS.time(platform="GitLab", stage="stats"):
+            cursors = load_cursors("pipelines")
+            heads = load_cursors("commits")
+            results = await run_parallel(
+                process_gitlab_project, db_repos, client, cache, cursors, heads
+            )
+            await flush_stage(
+                cache, [probe for probes, _ in results for probe in probes]
+            )
+        transitions = [t for _, repo_transitions in results for t in repo_transitions]
+        if transitions:
+            print(f"  🔧 {len(transitions)} pipeline status change(s).")
+        print("Operation Successful: GitLab Data Synchronized.")
+    finally:
+        cache.close()
+    return transitions
 
-    print("Stage 5: Fetching GitLab Pipelines...")
-    await run_parallel(process_gitlab_pipelines, db_repos, gl)
 
-    print("Operation Successful: GitLab Data Synchronized.")
+async def main():
+    async with HttpClient() as http:
+        transitions = await sync_gitlab(http)
+        http.rate_limits.log_budget("  ")
+        return transitions
 
 
 def sync_gitlab_data():
-    """Main.py tarafından çağrılan güvenli giriş noktası"""
+    """Tek başına (python gitlab_sync.py) çalıştırma için giriş noktası"""
     try:
-        # Eğer halihazırda çalışan bir loop varsa onu al, yoksa yeni oluştur
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(main())
-        loop.close()
+        return asyncio.run(main())
     except Exception as e:
         print(f"Sync Error: {e}")
+        return []
 
 
 if __name__ == "__main__":
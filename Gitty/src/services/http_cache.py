@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+from services.db_create import CACHE_PATH
+
+# Sayım probe'ları (en son güncellenen öğe) silinen/taşınan issue ve PR'ı görmez:
+# doğrulayıcı bu yaştan (sn) eskiyse gönderilmez, sayı baştan alınır. 0 = kapalı
+RECOUNT_AGE = int(os.getenv("GITTY_RECOUNT_AGE", "86400"))
+
+
+def cache_key(url, params=None):
+    """URL + sıralı parametrelerden sabit bir anahtar üretir"""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+class ResponseCache:
+    """
+    Endpoint başına ETag / Last-Modified doğrulayıcılarını saklar.
+
+    Gövde saklanmaz: 304 dönen bir endpoint için veri zaten DB'de
+    olduğundan parse ve yazma adımları tamamen atlanır.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stored_at = {}
+        self._pending = {}
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS Http_Cache (
+                    cache_key TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    next_url TEXT,
+                    updated_at INTEGER
+                )
+            """)
+            for key, etag, last_modified, next_url, updated_at in self._conn.execute(
+                "SELECT cache_key, etag, last_modified, next_url, updated_at "
+                "FROM Http_Cache"
+            ):
+                self._entries[key] = (etag, last_modified, next_url)
+                self._stored_at[key] = updated_at or 0
+        return self._conn
+
+    def validators(self, key):
+        """Koşullu istek başlıklarını döndürür (kayıt yoksa boş dict)"""
+        with self._lock:
+            self._connect()
+            entry = self._entries.get(key)
+        if not entry:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def expired(self, key, max_age=RECOUNT_AGE):
+        """Doğrulayıcı max_age saniyeden önce (son 200 yanıtta) kaydedildiyse True"""
+        if max_age <= 0:
+            return False
+        with self._lock:
+            self._connect()
+            stored_at = self._stored_at.get(key)
+        return stored_at is not None and time.time() - stored_at > max_age
+
+    def next_url(self, key):
+        """Sayfalı listelerde 304 alındığında bir sonraki sayfanın adresi"""
+        with self._lock:
+            self._connect()
+            entry = self._entries.get(key)
+        return entry[2] if entry else None
+
+    def store(self, key, headers, next_url=None):
+        """Başarılı bir DB yazımından sonra doğrulayıcıları kaydeder (persist() ile diske)"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        now = int(time.time())
+        with self._lock:
+            self._connect()
+            self._entries[key] = (etag, last_modified, next_url)
+            self._stored_at[key] = now
+            self._pending[key] = (etag, last_modified, next_url, now)
+
+    def persist(self):
+        """Bekleyen doğrulayıcıları tek transaction'da yazar"""
+        with self._lock:
+            if not self._pending:
+                return
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO Http_Cache "
+                "(cache_key, etag, last_modified, next_url, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, *entry) for key, entry in self._pending.items()],
+            )
+            conn.commit()
+            self._pending = {}
+
+    def close(self):
+        self.persist()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._entries = {}
+            self._stored_at = {}
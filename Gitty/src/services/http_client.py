@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from services.http_cache import cache_key
+from services.rate_limit import RateLimitController
+from services.request_policy import CircuitOpenError, RequestPolicy
+from services.telemetry import (
+    HTTP_REQUESTS,
+    HTTP_SECONDS,
+    RATE_CONCURRENCY,
+    RATE_REMAINING,
+    endpoint_label,
+)
+
+HOST_CONCURRENCY = int(os.getenv("GITTY_HOST_CONCURRENCY", "20"))
+POOL_SIZE = int(os.getenv("GITTY_HTTP_POOL", "100"))
+# Tek denemenin süresi; çağrının toplamı için bkz. GITTY_HTTP_DEADLINE
+REQUEST_TIMEOUT = float(os.getenv("GITTY_HTTP_TIMEOUT", "15"))
+
+
+class HttpError(Exception):
+    def __init__(self, status, url, body=""):
+        super().__init__(f"HTTP {status} for {url}: {body[:200]}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+
+class Response:
+    """Gövdesi okunmuş, bağlantıdan bağımsız yanıt"""
+
+    def __init__(self, status, url, headers, body, links):
+        self.status = status
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.links = links
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def next_url(self):
+        return self.links.get("next")
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HttpError(self.status, self.url, self.body)
+
+
+REQUEST_ERRORS = (
+    HttpError,
+    CircuitOpenError,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+)
+
+
+def is_transient(error):
+    """Tekrar denemekle düzelebilecek hata: ağ, zaman aşımı, açık devre, 5xx, kota"""
+    if isinstance(error, HttpError):
+        return error.status >= 500 or error.status in (403, 429)
+    return True
+
+
+class HttpClient:
+    """
+    Tüm sync motorlarının paylaştığı tek aiohttp oturumu.
+    Keep-alive bağlantı havuzu + kota bucket'ı başına eşzamanlılık;
+    thread açmadan ve her aşamada yeni TCP/TLS el sıkışması yapmadan çalışır.
+    Eşzamanlılık sınırı RateLimitController tarafından kotaya göre ayarlanır;
+    deadline, tekrar, hedging ve devre kesici RequestPolicy'den gelir.
+    """
+
+    def __init__(
+        self,
+        host_concurrency=HOST_CONCURRENCY,
+        pool_size=POOL_SIZE,
+        timeout=REQUEST_TIMEOUT,
+        policy=None,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.rate_limits = RateLimitController(initial=host_concurrency)
+        self.policy = policy or RequestPolicy()
+        self._session = None
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def bind(self, headers):
+        """Aynı oturumu kullanan, varsayılan başlıkları (token vb.) ekli görünüm"""
+        return BoundClient(self, headers)
+
+    async def request(
+        self, method, url, *, params=None, headers=None, json=None, idempotent=None
+    ):
+        """idempotent verilmezse sadece GET tekrarlanabilir sayılır"""
+        await self.start()
+        if idempotent is None:
+            idempotent = method == "GET"
+
+        host = urlsplit(url).netloc
+        breaker = self.policy.breaker(host)
+
+        def attempt(deadline):
+            return self._attempt(method, url, params, headers, json, deadline, breaker)
+
+        return await self.policy.call(host, attempt, idempotent)
+
+    async def _attempt(self, method, url, params, headers, json, deadline, breaker):
+        """Tek HTTP denemesi; süresi deneme sınırı ile kalan deadline'ın küçüğü"""
+        bucket = await self.rate_limits.acquire(url)
+        try:
+            # Kuyrukta beklerken devre açılmış olabilir: istek gönderilmez
+            breaker.check()
+        except CircuitOpenError:
+            await self.rate_limits.release(bucket)
+            raise
+        deadline.start()
+        started = time.monotonic()
+        status = resp_headers = None
+        try:
+            timeout = min(self.timeout, deadline.remaining())
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+            async with self._session.request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                json=json,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as resp:
+                status, resp_headers = resp.status, resp.headers
+                body = await resp.text()
+                links = {
+                    rel: str(link["url"])
+                    for rel, link in resp.links.items()
+                    if "url" in link
+                }
+                return Response(resp.status, str(resp.url), resp.headers, body, links)
+        finally:
+            elapsed = time.monotonic() - started
+            await self.rate_limits.release(bucket, status, resp_headers, elapsed)
+            self._observe(method, url, status, elapsed, bucket)
+
+    def _observe(self, method, url, status, elapsed, bucket):
+        host, endpoint = urlsplit(url).netloc, endpoint_label(url)
+        HTTP_REQUESTS.inc(
+            host=host, method=method, endpoint=endpoint, status=status or "error"
+        )
+        HTTP_SECONDS.observe(elapsed, host=host, endpoint=endpoint)
+        if bucket.remaining is not None:
+            RATE_REMAINING.set(bucket.remaining, bucket=bucket.name)
+        RATE_CONCURRENCY.set(bucket.concurrency, bucket=bucket.name)
+
+    async def get(self, url, params=None, headers=None):
+        return await self.request("GET", url, params=params, headers=headers)
+
+    async def post(self, url, json=None, headers=None, idempotent=False):
+        """Salt okunur sorgular (GraphQL) idempotent=True ile tekrarlanabilir"""
+        return await self.request(
+            "POST", url, json=json, headers=headers, idempotent=idempotent
+        )
+
+    async def conditional_get(self, url, params=None, headers=None, cache=None):
+        """
+        Kayıtlı doğrulayıcılarla GET atar.
+        (response, cache_key) döner; response.status == 304 ise veri değişmemiştir.
+        """
+        key = cache_key(url, params)
+        merged = dict(headers or {})
+        if cache:
+            merged.update(cache.validators(key))
+        resp = await self.get(url, params=params, headers=merged)
+        return resp, key
+
+
+class BoundClient:
+    """Platform başına token başlıklarını her isteğe ekler; oturum ve semaforlar ortak"""
+
+    def __init__(self, client, headers):
+        self.client = client
+        self.headers = headers
+
+    def _merge(self, headers):
+        return {**self.headers, **(headers or {})}
+
+    async def get(self, url, params=None, headers=None):
+        return await self.client.get(url, params=params, headers=self._merge(headers))
+
+    async def post(self, url, json=None, headers=None, idempotent=False):
+        return await self.client.post(
+            url, json=json, headers=self._merge(headers), idempotent=idempotent
+        )
+
+    async def conditional_get(self, url, params=None, headers=None, cache=None):
+        return await self.client.conditional_get(
+            url, params=params, headers=self._merge(headers), cache=cache
+        )
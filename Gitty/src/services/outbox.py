@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+from services.db_create import DB_PATH
+from services.db_writer import writer
+from services.telemetry import (
+    OUTBOX_DELIVERED,
+    OUTBOX_FAILED,
+    OUTBOX_LATENCY,
+    OUTBOX_PENDING,
+)
+from services.webhook import EMBED_FLUSH_DELAY, build_embed, notifier, pack_embeds
+
+OUTBOX_BATCH = int(os.getenv("GITTY_OUTBOX_BATCH", "500"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("GITTY_OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("GITTY_OUTBOX_BACKOFF", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("GITTY_OUTBOX_BACKOFF_MAX", "3600"))
+# Gönderilmiş / vazgeçilmiş satırlar bu kadar gün saklanır
+OUTBOX_RETENTION_DAYS = int(os.getenv("GITTY_OUTBOX_RETENTION_DAYS", "7"))
+# Uyandırılmasa da bekleyen (retry vadesi gelen) satırlar bu aralıkla kontrol edilir
+OUTBOX_POLL_INTERVAL = float(os.getenv("GITTY_OUTBOX_POLL", "30"))
+
+
+def enqueue(category, title, description, color=0x3498DB):
+    """Bildirimi outbox'a yazar; writer.flush() ile kalıcı olur, gönderimi worker yapar"""
+    writer.submit(
+        "outbox",
+        {
+            "category": category,
+            "embed": json.dumps(build_embed(title, description, color)),
+            "created_at": int(time.time()),
+        },
+    )
+
+
+PIPELINE_COLORS = {
+    "success": 0x2ECC71,  # Yeşil
+    "failed": 0xE74C3C,  # Kırmızı
+    "running": 0xF1C40F,  # Sarı
+    "pending": 0xF1C40F,
+    "canceled": 0x95A5A6,  # Gri
+}
+
+
+def format_pipeline_transition(transition):
+    """Pipeline durum geçişi için embed açıklaması"""
+    msg = f"**{transition['repo_name']}** (GITLAB)\n"
+    msg += f"#{transition['pipeline_id']}"
+    if transition.get("ref"):
+        msg += f" `{transition['ref']}`"
+    if transition["old_status"]:
+        msg += f"\n{transition['old_status']} ➡️ {transition['new_status']}"
+    else:
+        msg += f"\n🆕 {transition['new_status']}"
+    if transition.get("web_url"):
+        msg += f"\n{transition['web_url']}"
+    return msg
+
+
+def enqueue_pipeline_transition(pipeline, transition):
+    """
+    Pipeline satırını ve geçiş bildirimini tek kayıtta yazar. İkisi aynı
+    transaction'da commit edilir: durum kaydedildiyse bildirimi de kaydedilmiştir,
+    yeniden başlatmada "geçiş yok" görünüp uyarı kaybolmaz.
+    """
+    embed = build_embed(
+        "🔧 Pipeline Durumu",
+        format_pipeline_transition(transition),
+        PIPELINE_COLORS.get(transition["new_status"], 0x95A5A6),
+    )
+    writer.submit(
+        "pipeline_transition",
+        {
+            **pipeline,
+            "category": "pipelines",
+            "embed": json.dumps(embed),
+            "queued_at": int(time.time()),
+        },
+    )
+
+
+def load_pending(now, limit=OUTBOX_BATCH):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(
+            """
+            SELECT id, category, embed, attempts, created_at FROM Notification_Outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+        """,
+            (now, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return rows
+
+
+def count_pending():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM Notification_Outbox WHERE status = 'pending'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class OutboxWorker:
+    """
+    Notification_Outbox'ı sync döngüsünden bağımsız boşaltan arka plan görevi.
+    Bekleyen satırları kategori bazında 10 embed'lik mesajlara paketler,
+    kategorileri paralel gönderir; başarısız mesajlar üstel geri çekilmeyle
+    yeniden denenir. Yeniden başlatmada gönderilmemiş satırlar kaldığı yerden devam eder.
+    """
+
+    def __init__(self, notifier=notifier):
+        self.notifier = notifier
+        self._wake = asyncio.Event()
+        self._last_prune = 0
+        self.delivered = 0
+
+    def wake(self):
+        """Yeni kayıtlar commit edildi; worker beklemeden boşaltsın"""
+        self._wake.set()
+
+    async def run(self, active=None):
+        """active(): False dönerken satırlar gönderilmez (çok worker'lı modda lider değilse)"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=OUTBOX_POLL_INTERVAL)
+                # Peş peşe gelen bildirimler aynı mesaja paketlensin
+                await asyncio.sleep(EMBED_FLUSH_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if active is not None and not active():
+                continue
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"⚠️ Outbox gönderim hatası: {e}")
+
+    async def drain(self):
+        """Vadesi gelen tüm satırları gönderir; gönderilen satır sayısını döner"""
+        sent = 0
+        while True:
+            now = int(time.time())
+            rows = await asyncio.to_thread(load_pending, now)
+            if not rows:
+                break
+            by_category = {}
+            for row in rows:
+                by_category.setdefault(row[1], []).append(row)
+            results = await asyncio.gather(
+                *(
+                    self._deliver(category, items)
+                    for category, items in by_category.items()
+                )
+            )
+            await asyncio.to_thread(writer.flush)
+            sent += sum(results)
+            if len(rows) < OUTBOX_BATCH:
+                break
+
+        if time.time() - self._last_prune > 3600:
+            self._last_prune = time.time()
+            before = int(time.time()) - OUTBOX_RETENTION_DAYS * 86400
+            writer.submit("outbox_prune", {"before": before})
+            await asyncio.to_thread(writer.flush)
+        OUTBOX_PENDING.set(await asyncio.to_thread(count_pending))
+        self.delivered += sent
+        return sent
+
+    async def _deliver(self, category, rows):
+        """Bir kategorinin satırlarını sırayla gönderir; teslim edilen satır sayısı"""
+        if not self.notifier.has_webhook(category):
+            for row_id, _, _, attempts, _ in rows:
+                self._mark(row_id, "dead", attempts, "webhook URL geçersiz veya boş")
+            OUTBOX_FAILED.inc(len(rows), category=category, result="dead")
+            return 0
+
+        sent, retry_at = 0, None
+        items = [
+            ((row_id, attempts, created_at), json.loads(embed))
+            for row_id, _, embed, attempts, created_at in rows
+        ]
+        for message in pack_embeds(items):
+            if retry_at is not None:
+                # Sıra korunsun: başarısız mesajdan sonrakiler de onunla bekler
+                for (row_id, attempts, _), _ in message:
+                    self._mark(row_id, "pending", attempts, None, retry_at)
+                continue
+            ok = await self.notifier.send_embeds(category, [e for _, e in message])
+            now = time.time()
+            for (row_id, attempts, created_at), _ in message:
+                if ok:
+                    self._mark(row_id, "sent", attempts + 1)
+                    OUTBOX_LATENCY.observe(now - created_at, category=category)
+                    sent += 1
+                else:
+                    retry_at = self._retry(row_id, attempts + 1)
+                    result = "dead" if attempts + 1 >= OUTBOX_MAX_ATTEMPTS else "retry"
+                    OUTBOX_FAILED.inc(category=category, result=result)
+        OUTBOX_DELIVERED.inc(sent, category=category)
+        return sent
+
+    def _retry(self, row_id, attempts):
+        """Üstel geri çekilmeyle yeniden planlar; sonraki deneme zamanını döner"""
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            self._mark(row_id, "dead", attempts, "max attempts")
+            return time.time()
+        retry_at = time.time() + min(
+            OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1)
+        )
+        self._mark(row_id, "pending", attempts, "send failed", retry_at)
+        return retry_at
+
+    def _mark(self, row_id, status, attempts, error=None, next_attempt_at=None):
+        now = int(time.time())
+        writer.submit(
+            "outbox_status",
+            {
+                "id": row_id,
+                "status": status,
+                "attempts": attempts,
+                "next_attempt_at": int(next_attempt_at or now),
+                "delivered_at": now if status == "sent" else None,
+                "last_error": error,
+            },
+        )
+
+
+outbox = OutboxWorker()
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlsplit
+
+MIN_CONCURRENCY = int(os.getenv("GITTY_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = int(os.getenv("GITTY_MAX_CONCURRENCY", "50"))
+# Bu kadar istek hakkı kalınca reset'e kadar durulur (403'ü beklemeden)
+RATE_RESERVE = int(os.getenv("GITTY_RATE_RESERVE", "50"))
+# Kalan kota limitin bu oranının altına inince hız kotaya göre ayarlanır
+LOW_WATER = float(os.getenv("GITTY_RATE_LOW_WATER", "0.2"))
+
+
+def bucket_for(url):
+    """GitHub core/graphql/search kotaları ayrı; GitLab host başına tek kota"""
+    parts = urlsplit(url)
+    path = parts.path
+    if path.endswith("/graphql"):
+        return f"{parts.netloc}:graphql"
+    if path.startswith("/search"):
+        return f"{parts.netloc}:search"
+    return f"{parts.netloc}:core"
+
+
+def _header(headers, *names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class _Bucket:
+    def __init__(self, name, concurrency):
+        self.name = name
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        self.paused_until = 0.0
+        # Eşzamanlılık 1'in altına inmesi gerektiğinde istekler arası en az süre
+        self.interval = 0.0
+        self.next_send = 0.0
+        self.latency = None
+        self.cond = asyncio.Condition()
+
+
+class RateLimitController:
+    """
+    Her yanıttaki X-RateLimit-* (GitHub) / RateLimit-* (GitLab) başlıklarını okur.
+    Kota bolken eşzamanlılığı artırır, azalınca kalan kotayı reset'e kadar
+    yayacak seviyeye indirir, RATE_RESERVE'e gelince reset'e kadar bekletir.
+    """
+
+    def __init__(
+        self,
+        initial=MAX_CONCURRENCY,
+        min_concurrency=MIN_CONCURRENCY,
+        max_concurrency=MAX_CONCURRENCY,
+        reserve=RATE_RESERVE,
+    ):
+        self.initial = max(min_concurrency, min(initial, max_concurrency))
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.reserve = reserve
+        self._buckets = {}
+
+    def _bucket(self, name):
+        if name not in self._buckets:
+            self._buckets[name] = _Bucket(name, self.initial)
+        return self._buckets[name]
+
+    async def acquire(self, url):
+        bucket = self._bucket(bucket_for(url))
+        async with bucket.cond:
+            while True:
+                wait = bucket.paused_until - time.time()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(bucket.cond.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if bucket.in_flight < bucket.concurrency:
+                    wait = bucket.next_send - time.time()
+                    if wait <= 0:
+                        break
+                    # Aralıklı gönderim: slot boş ama sıradaki istek zamanı gelmedi
+                    try:
+                        await asyncio.wait_for(bucket.cond.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await bucket.cond.wait()
+            bucket.in_flight += 1
+            if bucket.interval:
+                bucket.next_send = time.time() + bucket.interval
+        return bucket
+
+    async def release(self, bucket, status=None, headers=None, elapsed=None):
+        async with bucket.cond:
+            bucket.in_flight -= 1
+            if elapsed is not None:
+                bucket.latency = (
+                    elapsed
+                    if bucket.latency is None
+                    else 0.8 * bucket.latency + 0.2 * elapsed
+                )
+            if headers is not None:
+                self._observe(bucket, status, headers)
+            # Sadece boşalan slot kadar bekleyen uyandırılır; notify_all binlerce
+            # bekleyen görevi her yanıtta uyandırıp döngüyü O(n²) yapıyordu
+            free = bucket.concurrency - bucket.in_flight
+            if free > 0:
+                bucket.cond.notify(free)
+
+    def _pause(self, bucket, until, reason):
+        if until > bucket.paused_until:
+            bucket.paused_until = until
+            print(
+                f"⏸️ Rate limit ({bucket.name}): {reason}, "
+                f"{until - time.time():.0f}s bekleniyor"
+            )
+
+    def _set_concurrency(self, bucket, value):
+        value = max(self.min_concurrency, min(self.max_concurrency, int(value)))
+        if value != bucket.concurrency:
+            bucket.concurrency = value
+
+    def _observe(self, bucket, status, headers):
+        now = time.time()
+        limit = _header(headers, "X-RateLimit-Limit", "RateLimit-Limit")
+        remaining = _header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        retry_after = _header(headers, "Retry-After")
+
+        if limit is not None:
+            bucket.limit = limit
+        if remaining is not None:
+            bucket.remaining = remaining
+        if reset is not None:
+            bucket.reset_at = reset
+
+        # İkincil limit / 429: sunucunun söylediği kadar bekle, yarıya in
+        if status in (403, 429) and retry_after is not None:
+            self._set_concurrency(bucket, bucket.concurrency // 2)
+            self._pause(bucket, now + retry_after, f"HTTP {status} retry-after")
+            return
+
+        if bucket.remaining is None:
+            return
+
+        if bucket.remaining <= self.reserve:
+            self._set_concurrency(bucket, self.min_concurrency)
+            self._pause(
+                bucket,
+                max(bucket.reset_at, now + 1),
+                f"kalan {bucket.remaining:.0f}/{bucket.limit or 0:.0f}",
+            )
+            return
+
+        if bucket.limit and bucket.remaining > bucket.limit * LOW_WATER:
+            # Kota bol: toplamsal artış
+            bucket.interval = 0.0
+            self._set_concurrency(bucket, bucket.concurrency + 1)
+            return
+
+        # Kota azaldı: Little yasası ile kalan kotayı reset'e kadar yayan eşzamanlılık
+        time_left = max(bucket.reset_at - now, 1)
+        allowed_rate = (bucket.remaining - self.reserve) / time_left
+        concurrency = allowed_rate * (bucket.latency or 1)
+        self._set_concurrency(bucket, concurrency)
+        # 1'in altı eşzamanlılıkla ifade edilemez: istekler 1/hız aralıkla gönderilir
+        bucket.interval = 1 / allowed_rate if concurrency < 1 else 0.0
+
+    def snapshot(self):
+        """Bucket başına kalan kota ve anlık eşzamanlılık (log/metrik için)"""
+        return {
+            name: {
+                "limit": b.limit,
+                "remaining": b.remaining,
+                "reset_in": max(0, round(b.reset_at - time.time())),
+                "concurrency": b.concurrency,
+                "in_flight": b.in_flight,
+            }
+            for name, b in self._buckets.items()
+        }
+
+    def export_state(self):
+        """Yeniden başlatmada sıcak başlangıç için kota durumu (JSON'a uygun)"""
+        return {
+            name: {
+                "limit": b.limit,
+                "remaining": b.remaining,
+                "reset_at": b.reset_at,
+                "paused_until": b.paused_until,
+                "concurrency": b.concurrency,
+                "latency": b.latency,
+            }
+            for name, b in self._buckets.items()
+            if b.remaining is not None
+        }
+
+    def restore(self, state, now=None):
+        """
+        export_state() çıktısını yükler: düşük kota ve bekleme süreleri yeniden
+        başlatmayla sıfırlanıp 403'e koşulmaz. Reset'i geçmiş bucket'lar atlanır.
+        """
+        now = now or time.time()
+        for name, saved in state.items():
+            if saved["reset_at"] <= now:
+                continue
+            bucket = self._bucket(name)
+            bucket.limit = saved["limit"]
+            bucket.remaining = saved["remaining"]
+            bucket.reset_at = saved["reset_at"]
+            bucket.latency = saved["latency"]
+            self._set_concurrency(bucket, saved["concurrency"])
+            if saved["paused_until"] > now:
+                self._pause(bucket, saved["paused_until"], "önceki çalışmadan")
+
+    def log_budget(self, prefix=""):
+        for name, s in self.snapshot().items():
+            if s["remaining"] is None:
+                continue
+            print(
+                f"{prefix}📊 {name}: kalan {s['remaining']:.0f}/{s['limit'] or 0:.0f}, "
+                f"reset {s['reset_in']}s, eşzamanlılık {s['concurrency']}"
+            )
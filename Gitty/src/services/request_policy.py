@@ -0,0 +1,242 @@
+import asyncio
+import os
+import random
+import time
+
+import aiohttp
+from services.telemetry import BREAKER_OPEN, HTTP_HEDGES, HTTP_RETRIES
+
+# Tek çağrının (denemeler + beklemeler) toplam süresi; kota kuyruğunda
+# geçen süre sayılmaz, ilk deneme kotadan geçince başlar
+REQUEST_DEADLINE = float(os.getenv("GITTY_HTTP_DEADLINE", "45"))
+RETRIES = int(os.getenv("GITTY_HTTP_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("GITTY_HTTP_BACKOFF", "0.5"))
+BACKOFF_MAX = float(os.getenv("GITTY_HTTP_BACKOFF_MAX", "8"))
+# Bu kadar saniyede cevap gelmeyen idempotent isteğe ikinci istek; 0 = kapalı
+HEDGE_AFTER = float(os.getenv("GITTY_HTTP_HEDGE_AFTER", "0"))
+# Art arda bu kadar hata (5xx, zaman aşımı, bağlantı) -> host için devre açılır
+BREAKER_FAILURES = int(os.getenv("GITTY_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("GITTY_BREAKER_COOLDOWN", "30"))
+
+RETRY_STATUSES = {500, 502, 503, 504}
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(Exception):
+    """Host devresi açık: istek gönderilmeden hemen reddedildi"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit open for {host}, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class Deadline:
+    """Çağrının toplam süre sınırı; start() ilk deneme kotadan geçince çağrılır"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = None
+        self.admitted = asyncio.Event()
+
+    def start(self):
+        if self.expires is None:
+            self.expires = time.monotonic() + self.seconds
+            self.admitted.set()
+
+    def remaining(self):
+        if self.expires is None:
+            return self.seconds
+        return self.expires - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Host başına devre: art arda hatalarda açılır ve cooldown boyunca istekleri
+    hemen reddeder (zorlanan API'ye yük bindirilmez). Cooldown sonunda tek bir
+    deneme isteğine izin verilir; başarılıysa kapanır, değilse yeniden açılır.
+    """
+
+    def __init__(self, name, threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+
+    @property
+    def healthy(self):
+        return self.opened_at is None and self.failures == 0
+
+    def check(self, probe=True):
+        """
+        İstek gönderilebilirse döner, yoksa CircuitOpenError. probe=False:
+        kuyruğa girmeden önceki ön kontrol, yarı açık devrenin deneme hakkını almaz.
+        """
+        if self.opened_at is None:
+            return
+        now = time.monotonic()
+        retry_in = self.opened_at + self.cooldown - now
+        if retry_in > 0:
+            raise CircuitOpenError(self.name, retry_in)
+        # Yarı açık: aynı anda tek deneme; takılan deneme cooldown sonra yenilenir
+        if self.probe_started is not None and now - self.probe_started < self.cooldown:
+            raise CircuitOpenError(self.name, self.probe_started + self.cooldown - now)
+        if probe:
+            self.probe_started = now
+
+    def success(self):
+        if self.opened_at is not None:
+            print(f"✅ Devre kapandı ({self.name})")
+            BREAKER_OPEN.set(0, host=self.name)
+        self.failures = 0
+        self.opened_at = self.probe_started = None
+
+    def failure(self):
+        self.failures += 1
+        if self.probe_started is None and self.failures < self.threshold:
+            return
+        if self.opened_at is None:
+            print(
+                f"🔌 Devre açıldı ({self.name}): {self.failures} art arda hata, "
+                f"{self.cooldown:g}s istek gönderilmeyecek"
+            )
+            BREAKER_OPEN.set(1, host=self.name)
+        self.opened_at = time.monotonic()
+        self.probe_started = None
+
+
+def _retry_after(resp):
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestPolicy:
+    """
+    HttpClient'ın her çağrısına uygulanan kuyruk gecikmesi denetimi:
+    çağrı başına deadline, 5xx/ağ hatası/Retry-After'lı 403-429 için jitter'lı
+    üstel geri çekilme, yavaş idempotent isteklere isteğe bağlı ikinci istek
+    (hedging) ve host başına devre kesici.
+    """
+
+    def __init__(
+        self,
+        deadline=REQUEST_DEADLINE,
+        retries=RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        hedge_after=HEDGE_AFTER,
+        breaker_failures=BREAKER_FAILURES,
+        breaker_cooldown=BREAKER_COOLDOWN,
+    ):
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self._breakers = {}
+
+    def breaker(self, host):
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                host, self.breaker_failures, self.breaker_cooldown
+            )
+        return self._breakers[host]
+
+    async def call(self, host, attempt, idempotent=True):
+        """
+        attempt(deadline) -> Response; tek HTTP denemesi. Deneme, kota slotunu
+        aldıktan sonra breaker(host).check() çağırmalıdır: kuyrukta beklerken
+        devre açılırsa istek gönderilmez (tekrar ve hedge denemeleri dahil).
+        Sadece idempotent çağrılar tekrarlanır ve hedge edilir.
+        """
+        breaker = self.breaker(host)
+        breaker.check(probe=False)
+        deadline = Deadline(self.deadline)
+        tries = 1 + (self.retries if idempotent else 0)
+        for n in range(tries):
+            last = n + 1 == tries
+            try:
+                if idempotent and self.hedge_after > 0 and breaker.healthy:
+                    resp = await self._hedged(host, attempt, deadline)
+                else:
+                    resp = await attempt(deadline)
+            except NETWORK_ERRORS:
+                breaker.failure()
+                if last or not await self._backoff(breaker, n, None, deadline, "error"):
+                    raise
+                continue
+
+            if resp.status in RETRY_STATUSES:
+                breaker.failure()
+                if last or not await self._backoff(
+                    breaker, n, _retry_after(resp), deadline, str(resp.status)
+                ):
+                    return resp
+                continue
+
+            # İkincil kota / 429: sunucu ne kadar beklenmesini söylediyse
+            # (bucket zaten duraklatıldı); birincil kota bitişinde tekrar yok
+            breaker.success()
+            retry_after = _retry_after(resp)
+            if resp.status in (403, 429) and retry_after is not None and not last:
+                if await self._backoff(
+                    breaker, n, retry_after, deadline, str(resp.status)
+                ):
+                    continue
+            return resp
+
+    async def _backoff(self, breaker, n, retry_after, deadline, reason):
+        """
+        Tam jitter'lı üstel bekleme. Deadline'a sığmıyorsa ya da bu arada devre
+        açıldıysa False: son sonuç (yanıt ya da hata) çağırana döner.
+        """
+        if breaker.opened_at is not None:
+            return False
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**n))
+        if delay >= deadline.remaining():
+            return False
+        HTTP_RETRIES.inc(host=breaker.name, reason=reason)
+        await asyncio.sleep(delay)
+        return breaker.opened_at is None
+
+    async def _hedged(self, host, attempt, deadline):
+        """
+        İlk istek kotadan geçtikten sonra hedge_after içinde cevap yoksa ikinci
+        istek; ilk başarılı olan kazanır. Kuyrukta bekleyen istek hedge edilmez.
+        """
+        first = asyncio.ensure_future(attempt(deadline))
+        admitted = asyncio.ensure_future(deadline.admitted.wait())
+        await asyncio.wait({first, admitted}, return_when=asyncio.FIRST_COMPLETED)
+        admitted.cancel()
+        if not first.done():
+            await asyncio.wait({first}, timeout=self.hedge_after)
+        if first.done():
+            return first.result()
+
+        HTTP_HEDGES.inc(host=host, result="sent")
+        second = asyncio.ensure_future(attempt(deadline))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            HTTP_HEDGES.inc(host=host, result="won")
+                        return task.result()
+            # İkisi de hata verdi
+            raise task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,144 @@
+import heapq
+import os
+import random
+import sqlite3
+import time
+
+from services.db_create import DB_PATH
+from services.db_writer import writer
+
+POLL_MIN = int(os.getenv("GITTY_POLL_MIN", "300"))
+POLL_MAX = int(os.getenv("GITTY_POLL_MAX", "21600"))
+# Değişiklik yoksa aralık bu katsayıyla büyür, değişiklikte yarıya iner
+POLL_BACKOFF = float(os.getenv("GITTY_POLL_BACKOFF", "1.5"))
+DISCOVERY_INTERVAL = int(os.getenv("GITTY_DISCOVERY_INTERVAL", "1800"))
+# Yüklenirken bu kadar saniye içinde kontrol edilmiş repolar hemen vadeli olmaz
+# (yarıda kalan döngüde işlenmiş ama planı yazılamamış repolar)
+SYNC_FRESHNESS = int(os.getenv("GITTY_SYNC_FRESHNESS", str(POLL_MIN)))
+
+
+class PollScheduler:
+    """
+    Repo başına bir sonraki kontrol zamanına göre sıralı öncelik kuyruğu.
+    Aralık her repo için değişim hızına uyum sağlar: değişiklik görülen repo
+    daha sık, boşta kalan repo POLL_MAX'a kadar daha seyrek yoklanır.
+    Durum Poll_Schedule tablosunda saklanır, yeniden başlatmada kaybolmaz.
+    """
+
+    def __init__(self, min_interval=POLL_MIN, max_interval=POLL_MAX, owns=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # owns(platform, repo_name): çok worker'lı modda sadece bu worker'ın repoları
+        self.owns = owns
+        self._heap = []
+        self._entries = {}  # repo_id -> (next_due, interval)
+
+    def load(self):
+        """
+        Kayıtlı planı ve henüz planda olmayan repoları (hemen vadeli) yükler;
+        tazelik penceresinde kontrol edilmiş repolar pencere sonuna ertelenir.
+        Pasifleşen ya da (shard aralığı değiştiyse) artık bu worker'a ait
+        olmayan repolar düşer. due() ile çıkarılıp record() görmemiş repolar
+        (döngü hata verdi) hemen vadeli olarak kuyruğa geri konur.
+        """
+        now = int(time.time())
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            rows = conn.execute("""
+                SELECT r.id, r.platform, r.repo_name, s.next_due, s.interval,
+                       s.last_checked_at
+                FROM Repositories r
+                LEFT JOIN Poll_Schedule s ON s.repo_id = r.id
+                WHERE r.active = 1
+            """).fetchall()
+        finally:
+            conn.close()
+
+        if self.owns is not None:
+            rows = [row for row in rows if self.owns(row[1], row[2])]
+        wanted = {row[0] for row in rows}
+        # Pasifleşen/başka worker'a geçen repolar; heap'te kalan eski kayıtlar
+        # due()/next_wakeup() içinde atlanır
+        for repo_id in [r for r in self._entries if r not in wanted]:
+            del self._entries[repo_id]
+
+        live = {
+            repo_id
+            for next_due, repo_id in self._heap
+            if self._entries.get(repo_id, (None,))[0] == next_due
+        }
+        for repo_id, _, _, next_due, interval, checked_at in rows:
+            if repo_id in self._entries:
+                if repo_id not in live:
+                    self._push(repo_id, now, self._entries[repo_id][1])
+                continue
+            next_due = next_due or now
+            if checked_at:
+                next_due = max(next_due, checked_at + SYNC_FRESHNESS)
+            self._push(repo_id, next_due, interval or self.min_interval)
+        return len(self._entries)
+
+    def _push(self, repo_id, next_due, interval):
+        self._entries[repo_id] = (next_due, interval)
+        heapq.heappush(self._heap, (next_due, repo_id))
+
+    def due(self, now=None):
+        """Vadesi gelmiş repo id'lerini kuyruktan çıkarır"""
+        now = now or time.time()
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, repo_id = heapq.heappop(self._heap)
+            entry = self._entries.get(repo_id)
+            # Eski (yeniden planlanmış) heap kayıtlarını atla
+            if entry is None or entry[0] != next_due:
+                continue
+            ready.append(repo_id)
+        return ready
+
+    def record(self, repo_id, changed, now=None, failed=False):
+        """
+        Kontrol sonucu: aralığı uyarlar ve bir sonraki vadeyi planlar.
+        failed: istekler hata verdi / zaman aşımı; aralık değişmez, repo taban
+        aralıkla yeniden denenir ve kontrol edilmiş sayılmaz.
+        """
+        now = int(now or time.time())
+        _, interval = self._entries.get(repo_id, (now, self.min_interval))
+        if failed:
+            wait = self.min_interval
+        elif changed:
+            interval = wait = max(self.min_interval, int(interval / 2))
+        else:
+            interval = wait = min(self.max_interval, int(interval * POLL_BACKOFF))
+        # Aynı anda eklenen repolar hep birlikte vadelenmesin
+        next_due = now + int(wait * random.uniform(0.9, 1.1))
+        self._push(repo_id, next_due, interval)
+        writer.submit(
+            "schedule",
+            {
+                "repo_id": repo_id,
+                "next_due": next_due,
+                "interval": interval,
+                "changed": int(bool(changed) and not failed),
+                "checked_at": None if failed else now,
+            },
+        )
+
+    def wake(self, repo_id, now=None):
+        """Repoyu aralığını değiştirmeden hemen vadeli yapar (ör. webhook sonrası)"""
+        _, interval = self._entries.get(repo_id, (None, self.min_interval))
+        self._push(repo_id, int(now or time.time()), interval)
+
+    def next_wakeup(self):
+        while self._heap:
+            next_due, repo_id = self._heap[0]
+            entry = self._entries.get(repo_id)
+            if entry is not None and entry[0] == next_due:
+                return next_due
+            heapq.heappop(self._heap)
+        return None
+
+    def __contains__(self, repo_id):
+        return repo_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
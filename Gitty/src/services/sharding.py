@@ -0,0 +1,119 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import zlib
+
+from services.db_create import DB_PATH
+from services.db_writer import begin_immediate, configure_connection
+
+# 0 = tek worker (sharding kapalı); tüm worker'larda aynı olmalı
+SHARD_COUNT = int(os.getenv("GITTY_SHARDS", "0"))
+WORKER_ID = os.getenv("GITTY_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# Bu kadar saniye heartbeat gelmeyen worker ölü sayılır, shard'ları dağıtılır
+LEASE_TTL = int(os.getenv("GITTY_LEASE_TTL", "90"))
+
+
+def shard_of(platform, repo_name, shards=SHARD_COUNT):
+    """Repo anahtarının (platform_repo_name) crc32'si; tüm süreçlerde aynı sonuç"""
+    return zlib.crc32(f"{platform}_{repo_name}".encode()) % shards
+
+
+def shard_range(index, workers, shards):
+    """Sıralı canlı worker listesinde index'inci worker'ın [başlangıç, bitiş) aralığı"""
+    return index * shards // workers, (index + 1) * shards // workers
+
+
+class ShardLease:
+    """
+    Worker_Leases üzerinden repo shard'larının paylaşımı.
+    Her heartbeat'te süresi dolan kiralar silinir ve aralıklar canlı worker
+    listesinden yeniden hesaplanır: worker eklenince ya da ölünce shard'lar
+    kendiliğinden yeniden dağılır. Liste sırasında ilk worker lider olur;
+    repo listesi, Change_Log bildirimleri, outbox ve rollup sadece onda çalışır.
+    """
+
+    def __init__(self, worker_id=WORKER_ID, shards=SHARD_COUNT, ttl=LEASE_TTL):
+        self.worker_id = worker_id
+        self.shards = shards
+        self.ttl = ttl
+        self.start, self.end = 0, shards
+        self.workers = [worker_id]
+
+    @property
+    def interval(self):
+        return max(1, self.ttl / 3)
+
+    @property
+    def is_leader(self):
+        return self.workers[0] == self.worker_id
+
+    def owns(self, platform, repo_name):
+        return self.start <= shard_of(platform, repo_name, self.shards) < self.end
+
+    def heartbeat(self, now=None):
+        """Kirayı yeniler ve aralığı hesaplar; aralık değiştiyse True döner"""
+        now = int(now or time.time())
+        conn = configure_connection(sqlite3.connect(DB_PATH, isolation_level=None))
+        try:
+            # Üyelik okuma + kira yazma tek kilitli transaction'da; writer'lar
+            # kilidi kısa tuttuğu için busy_timeout + sınırlı tekrar yeterli
+            begin_immediate(conn)
+            conn.execute("DELETE FROM Worker_Leases WHERE expires_at <= ?", (now,))
+            rows = conn.execute(
+                "SELECT worker_id, shard_count FROM Worker_Leases"
+            ).fetchall()
+            others = {worker_id for worker_id, _ in rows} - {self.worker_id}
+            mismatched = {count for _, count in rows if count != self.shards}
+            workers = sorted(others | {self.worker_id})
+            start, end = shard_range(
+                workers.index(self.worker_id), len(workers), self.shards
+            )
+            conn.execute(
+                """
+                INSERT INTO Worker_Leases
+                    (worker_id, shard_start, shard_end, shard_count, heartbeat_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(worker_id) DO UPDATE SET
+                    shard_start = excluded.shard_start, shard_end = excluded.shard_end,
+                    shard_count = excluded.shard_count,
+                    heartbeat_at = excluded.heartbeat_at, expires_at = excluded.expires_at
+            """,
+                (self.worker_id, start, end, self.shards, now, now + self.ttl),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        if mismatched:
+            print(f"⚠️ GITTY_SHARDS farklı worker'lar var: {sorted(mismatched)}")
+        changed = (start, end) != (self.start, self.end) or workers != self.workers
+        self.start, self.end, self.workers = start, end, workers
+        if changed:
+            role = "lider" if self.is_leader else "worker"
+            print(
+                f"🧩 {self.worker_id}: shard [{start}, {end}) / {self.shards}, "
+                f"{len(workers)} worker ({role})"
+            )
+        return changed
+
+    def release(self):
+        """Kapanışta kirayı bırakır; diğerleri beklemeden shard'ları devralır"""
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM Worker_Leases WHERE worker_id = ?", (self.worker_id,)
+                )
+        finally:
+            conn.close()
+
+    async def run(self):
+        """Uzun sync döngüleri sırasında da kiranın düşmemesi için arka plan heartbeat'i"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.heartbeat)
+            except sqlite3.Error as e:
+                print(f"⚠️ Shard heartbeat hatası: {e}")
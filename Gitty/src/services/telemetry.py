@@ -0,0 +1,344 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+# 0 = kapalı; açıkken /metrics (Prometheus metni) ve /metrics.json sunulur
+TELEMETRY_PORT = int(os.getenv("GITTY_TELEMETRY_PORT", "0"))
+TELEMETRY_HOST = os.getenv("GITTY_TELEMETRY_HOST", "127.0.0.1")
+
+# Saniye cinsinden histogram sınırları
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LONG_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """
+    Etiket değerleri başına tek değer tutan metrik.
+    DB writer thread'i de yazdığı için güncellemeler kilitle korunur.
+    """
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def items(self):
+        with self._lock:
+            return [
+                (dict(zip(self.labels, key)), self._copy(value))
+                for key, value in self._values.items()
+            ]
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def lines(self):
+        for labels, value in self.items():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+    def to_json(self, value):
+        return value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [bucket sayaçları..., +Inf], toplam
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """with bloğunun süresini gözlemler (hata olsa da)"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+    def lines(self):
+        for labels, (counts, total) in self.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total!r}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+    def to_json(self, value):
+        counts, total = value
+        return {
+            "count": sum(counts),
+            "sum": round(total, 6),
+            "buckets": dict(
+                zip([str(b) for b in self.buckets] + ["+Inf"], counts),
+            ),
+        }
+
+
+def _register(cls, name, help_text, labels=(), **kwargs):
+    """Aynı isim tekrar istenirse mevcut metriği döner"""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help_text, labels, **kwargs)
+        return metric
+
+
+def counter(name, help_text, labels=()):
+    return _register(Counter, name, help_text, labels)
+
+
+def gauge(name, help_text, labels=()):
+    return _register(Gauge, name, help_text, labels)
+
+
+def histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help_text, labels, buckets=buckets)
+
+
+def render_prometheus():
+    """Prometheus text exposition formatı (0.0.4)"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    out = []
+    for metric in metrics:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.lines())
+    return "\n".join(out) + "\n"
+
+
+def snapshot():
+    """{metrik: {"type", "help", "samples": [{"labels", "value"}]}}"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {
+        metric.name: {
+            "type": metric.kind,
+            "help": metric.help,
+            "samples": [
+                {"labels": labels, "value": metric.to_json(value)}
+                for labels, value in metric.items()
+            ],
+        }
+        for metric in metrics
+    }
+
+
+def endpoint_label(url):
+    """
+    İstek URL'ini düşük kardinaliteli uç nokta adına indirger:
+    /repos/{owner}/{repo}/issues, /api/v4/projects/{id}/pipelines ...
+    """
+    parts = urlsplit(url)
+    segments = parts.path.strip("/").split("/")
+    if len(segments) >= 3 and segments[0] == "repos":
+        segments[1:3] = ["{owner}", "{repo}"]
+        # compare/<base>...<head>: her head değişimi yeni seri açmasın
+        if len(segments) >= 5 and segments[3] == "compare":
+            segments[4:] = ["{basehead}"]
+    elif len(segments) >= 4 and segments[:3] == ["api", "v4", "projects"]:
+        segments[3] = "{id}"
+    return "/" + "/".join(segments)
+
+
+# Sync / HTTP
+STAGE_SECONDS = histogram(
+    "gitty_sync_stage_seconds",
+    "Duration of a sync stage",
+    ("platform", "stage"),
+    buckets=LONG_BUCKETS,
+)
+CYCLE_SECONDS = histogram(
+    "gitty_sync_cycle_seconds",
+    "Duration of one scheduler cycle",
+    buckets=LONG_BUCKETS,
+)
+REPOS_SYNCED = counter(
+    "gitty_repos_synced_total", "Repositories whose stats were fetched", ("platform",)
+)
+COMMIT_COUNTS = counter(
+    "gitty_commit_counts_total",
+    "Commit counts by method: unchanged head, compare range or full recount",
+    ("platform", "mode"),
+)
+DISCOVERED_REPOS = counter(
+    "gitty_discovery_repos_total",
+    "Repositories returned by discovery (changed since cursor, or all on a sweep)",
+    ("platform", "sweep"),
+)
+HTTP_REQUESTS = counter(
+    "gitty_http_requests_total",
+    "API requests by endpoint and status (error = no response)",
+    ("host", "method", "endpoint", "status"),
+)
+HTTP_SECONDS = histogram(
+    "gitty_http_request_seconds", "API request latency", ("host", "endpoint")
+)
+HTTP_RETRIES = counter(
+    "gitty_http_retries_total",
+    "Requests retried after backoff, by cause (status code or error)",
+    ("host", "reason"),
+)
+HTTP_HEDGES = counter(
+    "gitty_http_hedges_total",
+    "Hedged duplicate requests sent, and how many answered first",
+    ("host", "result"),
+)
+BREAKER_OPEN = gauge(
+    "gitty_circuit_open",
+    "1 while the host's circuit breaker is open and requests are shed",
+    ("host",),
+)
+RATE_REMAINING = gauge(
+    "gitty_rate_limit_remaining",
+    "Remaining API quota per rate-limit bucket",
+    ("bucket",),
+)
+RATE_CONCURRENCY = gauge(
+    "gitty_rate_limit_concurrency",
+    "Allowed concurrent requests per rate-limit bucket",
+    ("bucket",),
+)
+
+# SQLite
+DB_WRITE_SECONDS = histogram(
+    "gitty_db_write_seconds", "executemany time per record kind", ("kind",)
+)
+DB_ROWS = counter("gitty_db_rows_total", "Records written per kind", ("kind",))
+DB_COMMIT_SECONDS = histogram("gitty_db_commit_seconds", "SQLite COMMIT time")
+DB_ERRORS = counter("gitty_db_errors_total", "Failed statements per kind", ("kind",))
+
+# Bildirimler
+OUTBOX_PENDING = gauge("gitty_outbox_pending", "Undelivered notification rows")
+OUTBOX_DELIVERED = counter(
+    "gitty_outbox_delivered_total", "Notification rows delivered", ("category",)
+)
+OUTBOX_FAILED = counter(
+    "gitty_outbox_failed_total",
+    "Notification rows that failed (retry or dead)",
+    ("category", "result"),
+)
+OUTBOX_LATENCY = histogram(
+    "gitty_outbox_delivery_seconds",
+    "Time from enqueue to delivery",
+    ("category",),
+    buckets=LONG_BUCKETS,
+)
+DISCORD_REQUESTS = counter(
+    "gitty_discord_requests_total",
+    "Discord webhook calls by status (error = no response)",
+    ("category", "status"),
+)
+DISCORD_SECONDS = histogram(
+    "gitty_discord_request_seconds", "Discord webhook call latency", ("category",)
+)
+
+# Webhook alıcısı
+RECEIVER_EVENTS = counter(
+    "gitty_receiver_events_total",
+    "Incoming webhook deliveries by result",
+    ("platform", "result"),
+)
+RECEIVER_APPLY_SECONDS = histogram(
+    "gitty_receiver_apply_seconds", "Time to apply one batch of webhook events"
+)
+
+
+class TelemetryServer:
+    """Yerel scraper için küçük aiohttp sunucusu: /metrics ve /metrics.json"""
+
+    def __init__(self, host=TELEMETRY_HOST, port=TELEMETRY_PORT):
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_prometheus)
+        app.router.add_get("/metrics.json", self.handle_json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📈 Telemetri aktif: http://{self.host}:{self.port}/metrics")
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._runner = None
+
+    async def handle_prometheus(self, request):
+        return web.Response(
+            text=render_prometheus(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def handle_json(self, request):
+        return web.Response(
+            text=json.dumps(snapshot()), content_type="application/json"
+        )
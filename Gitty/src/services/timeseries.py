@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import time
+
+from services.db_create import DB_PATH
+from services.db_writer import METRIC_FIELDS, writer
+
+RAW, HOURLY, DAILY = 0, 3600, 86400
+RAW_BUCKET = 60  # ham satırlar dakikaya yuvarlanır
+
+# Saklama: ham -> saatlik -> günlük; günlük de bu kadar gün sonra silinir
+METRICS_RAW_DAYS = int(os.getenv("GITTY_METRICS_RAW_DAYS", "2"))
+METRICS_HOURLY_DAYS = int(os.getenv("GITTY_METRICS_HOURLY_DAYS", "90"))
+METRICS_DAILY_DAYS = int(os.getenv("GITTY_METRICS_DAILY_DAYS", "1825"))
+ROLLUP_INTERVAL = int(os.getenv("GITTY_METRICS_ROLLUP_INTERVAL", "3600"))
+# Güncelleme bildirimindeki trend satırının penceresi (gün); 0 = kapalı
+TREND_DAYS = int(os.getenv("GITTY_TREND_DAYS", "7"))
+TREND_LABELS = {"stars": "🌟 yıldız", "forks": "🍴 fork", "commits": "📝 commit"}
+
+
+def record_changes(changes, now=None):
+    """
+    Change_Log'dan gelen alan farklarını ham seriye yazar.
+    Yeni eklenen repoların ilk değerleri "kazanım" sayılmaz.
+    """
+    ts = int(now or time.time()) // RAW_BUCKET * RAW_BUCKET
+    for repo_id, entry in changes.items():
+        if entry["added"] or not entry["fields"]:
+            continue
+        record = {"repo_id": repo_id, "ts": ts}
+        for field in METRIC_FIELDS:
+            old_value, new_value = entry["fields"].get(field, (0, 0))
+            record[field] = (new_value or 0) - (old_value or 0)
+        writer.submit("metric", record)
+
+
+def rollup(now=None):
+    """
+    Eski ham satırları saatliğe, eski saatlikleri günlüğe indirger, süresi
+    dolan günlükleri siler. Her adım writer'da tek transaction'da çalışır.
+    """
+    now = int(now or time.time())
+    raw_before = (now - METRICS_RAW_DAYS * 86400) // HOURLY * HOURLY
+    hourly_before = (now - METRICS_HOURLY_DAYS * 86400) // DAILY * DAILY
+    writer.submit(
+        "metrics_rollup",
+        {"from_resolution": RAW, "to_resolution": HOURLY, "before": raw_before},
+    )
+    writer.submit(
+        "metrics_rollup",
+        {"from_resolution": HOURLY, "to_resolution": DAILY, "before": hourly_before},
+    )
+    if METRICS_DAILY_DAYS > 0:
+        writer.submit(
+            "metrics_expire",
+            {"resolution": DAILY, "before": now - METRICS_DAILY_DAYS * 86400},
+        )
+    return writer.flush()
+
+
+def window_deltas(repo_id, since, until=None):
+    """
+    [since, until) aralığında repo başına toplam farklar ({metrik: fark}).
+    Çözünürlükler çakışmadığı için hepsi toplanır; indirgenmiş eski veride
+    sınırlar saat/gün hassasiyetindedir.
+    """
+    until = until or int(time.time()) + 1
+    sums = ", ".join(f"COALESCE(SUM({f}), 0)" for f in METRIC_FIELDS)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute(
+            f"""
+            SELECT {sums} FROM Repo_Metrics
+            WHERE repo_id = ? AND resolution IN (?, ?, ?) AND ts >= ? AND ts < ?
+        """,
+            (repo_id, RAW, HOURLY, DAILY, since, until),
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(METRIC_FIELDS, row))
+
+
+def trend_line(repo_id, fields, now=None):
+    """
+    Bildirim için son TREND_DAYS gündeki toplam fark, bu değişiklik dahil
+    (record_changes bildirimden sonra yazar). Sadece şimdi değişen yıldız/fork/commit.
+    """
+    changed = [f for f in TREND_LABELS if f in fields]
+    if TREND_DAYS <= 0 or not changed:
+        return None
+    now = int(now or time.time())
+    deltas = window_deltas(repo_id, now - TREND_DAYS * 86400, now + 1)
+    parts = []
+    for field in changed:
+        old_value, new_value = fields[field]
+        total = deltas[field] + (new_value or 0) - (old_value or 0)
+        if total:
+            parts.append(f"{total:+d} {TREND_LABELS[field]}")
+    if not parts:
+        return None
+    return f"📈 Son {TREND_DAYS} gün: " + ", ".join(parts)
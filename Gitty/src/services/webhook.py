@@ -1,13 +1,95 @@
 import asyncio
 import os
+import time
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import aiohttp
 from dotenv import load_dotenv
+from services.telemetry import DISCORD_REQUESTS, DISCORD_SECONDS
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(os.path.join(BASE_DIR, ".env"))
 
+DISCORD_POOL_SIZE = int(os.getenv("GITTY_DISCORD_POOL", "10"))
+DISCORD_TIMEOUT = float(os.getenv("GITTY_DISCORD_TIMEOUT", "15"))
+# Outbox'a yeni bildirim gelince aynı mesaja paketlenecekler için bu kadar beklenir
+EMBED_FLUSH_DELAY = float(os.getenv("GITTY_EMBED_FLUSH_DELAY", "2"))
+# 429 sonrası aynı mesaj için en fazla bu kadar yeniden deneme
+DISCORD_MAX_RETRIES = int(os.getenv("GITTY_DISCORD_RETRIES", "3"))
+
+# Discord sınırları: mesaj başına 10 embed, tüm embed metinleri toplam 6000 karakter
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_MESSAGE_CHARS = 6000
+MAX_TITLE_CHARS = 256
+MAX_DESCRIPTION_CHARS = 4096
+FOOTER_TEXT = "Gitty Bot - Database Sync"
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def build_embed(title, description, color=0x3498DB):
+    return {
+        "title": title[:MAX_TITLE_CHARS],
+        "description": description[:MAX_DESCRIPTION_CHARS],
+        "color": color,
+        "footer": {"text": FOOTER_TEXT},
+    }
+
+
+def embed_size(embed):
+    """Discord'un 6000 karakter sınırına sayılan metin uzunluğu"""
+    return (
+        len(embed["title"]) + len(embed["description"]) + len(embed["footer"]["text"])
+    )
+
+
+def pack_embeds(items):
+    """
+    (anahtar, embed) listesini sırayı bozmadan Discord mesajlarına böler:
+    mesaj başına en fazla 10 embed ve toplam 6000 karakter.
+    """
+    message, size = [], 0
+    for key, embed in items:
+        embed_chars = embed_size(embed)
+        if message and (
+            len(message) >= MAX_EMBEDS_PER_MESSAGE
+            or size + embed_chars > MAX_MESSAGE_CHARS
+        ):
+            yield message
+            message, size = [], 0
+        message.append((key, embed))
+        size += embed_chars
+    if message:
+        yield message
+
+
+def is_webhook_url(url):
+    """https zorunlu; sadece yerel test/benchmark sunucuları için http://localhost"""
+    if not url:
+        return False
+    if url.startswith("https://"):
+        return True
+    host = urlsplit(url).hostname
+    return url.startswith("http://") and host in LOCAL_HOSTS
+
+
+def _header(headers, name):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _WebhookBucket:
+    """Bir webhook URL'inin Discord rate limit durumu"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # Aynı webhook'a mesajlar sırayla gider
+        self.name = None  # X-RateLimit-Bucket
+        self.remaining = None
+        self.reset_at = 0.0
+
 
 class DiscordNotifier:
     def __init__(self):
@@ -18,40 +100,116 @@ class DiscordNotifier:
         }
         print("🔍 Webhook URLs yüklendi:")
         for k, v in self.webhooks.items():
-            print(f"  {k}: {v if v else '❌ BOŞ'}")
+            # URL'nin kendisi token içerir: loglanmaz
+            print(f"  {k}: {'✅ ayarlı' if v else '❌ BOŞ'}")
+        self._session = None
+        self._buckets = {}  # url -> _WebhookBucket
+        self._global_until = 0.0
+
+    async def start(self):
+        """Tüm mesajların paylaştığı keep-alive oturumu açar (her mesajda TLS yok)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=DISCORD_POOL_SIZE,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=DISCORD_TIMEOUT),
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def has_webhook(self, category):
+        return is_webhook_url(self.webhooks.get(category))
 
     async def send_embed(self, category, title, description, color=0x3498DB):
-        url = self.webhooks.get(category)  # ÖNCE url'yi tanımla
-        print(f"[DEBUG] Sending to {category}: {url}")  # SONRA yazdır
+        return await self.send_embeds(
+            category, [build_embed(title, description, color)]
+        )
 
-        if not url or not url.startswith("https"):
+    async def send_embeds(self, category, embeds):
+        """Tek webhook çağrısında en fazla 10 embed gönderir"""
+        url = self.webhooks.get(category)
+
+        if not is_webhook_url(url):
             print(f"❌ {category} webhook URL geçersiz veya boş")
             return False
 
-        payload = {
-            "embeds": [
-                {
-                    "title": title,
-                    "description": description,
-                    "color": color,
-                    "footer": {"text": "Gitty Bot - Database Sync"},
-                }
-            ]
-        }
+        payload = {"embeds": embeds}
+        bucket = self._buckets.setdefault(url, _WebhookBucket())
 
         try:
-            headers = {"Content-Type": "application/json"}
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.post(url, json=payload) as resp:
-                    if resp.status in [200, 204]:
-                        print(f"✅ Webhook başarılı: {category}")
-                        return True
-                    else:
-                        print(f"❌ Webhook hatası {resp.status}: {await resp.text()}")
-                        return False
+            await self.start()
+            async with bucket.lock:
+                for _ in range(DISCORD_MAX_RETRIES + 1):
+                    await self._wait_for_quota(bucket)
+                    started = time.monotonic()
+                    async with self._session.post(url, json=payload) as resp:
+                        DISCORD_SECONDS.observe(
+                            time.monotonic() - started, category=category
+                        )
+                        DISCORD_REQUESTS.inc(category=category, status=resp.status)
+                        self._observe(bucket, resp.headers)
+                        if resp.status in [200, 204]:
+                            print(
+                                f"✅ Webhook başarılı: {category} ({len(embeds)} embed)"
+                            )
+                            return True
+                        if resp.status != 429:
+                            print(
+                                f"❌ Webhook hatası {resp.status}: {await resp.text()}"
+                            )
+                            return False
+                        await self._on_rate_limited(bucket, resp)
+                print(f"❌ Webhook rate limit: {category} mesajı gönderilemedi")
+                return False
         except Exception as e:
+            DISCORD_REQUESTS.inc(category=category, status="error")
             print(f"❌ Webhook bağlantı hatası: {e}")
             return False
 
+    async def _wait_for_quota(self, bucket):
+        """Global limit ya da bucket kotası bitmişse reset'e kadar bekler"""
+        now = time.monotonic()
+        wait = self._global_until - now
+        if bucket.remaining is not None and bucket.remaining <= 0:
+            wait = max(wait, bucket.reset_at - now)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _observe(self, bucket, headers):
+        remaining = _header(headers, "X-RateLimit-Remaining")
+        reset_after = _header(headers, "X-RateLimit-Reset-After")
+        bucket.name = headers.get("X-RateLimit-Bucket", bucket.name)
+        if remaining is not None:
+            bucket.remaining = remaining
+        if reset_after is not None:
+            bucket.reset_at = time.monotonic() + reset_after
+
+    async def _on_rate_limited(self, bucket, resp):
+        """429: retry_after kadar bekle; global ise tüm webhook'lar durur"""
+        try:
+            body = await resp.json(content_type=None) or {}
+        except ValueError:
+            body = {}
+        retry_after = body.get("retry_after") or _header(resp.headers, "Retry-After")
+        retry_after = float(retry_after or 1)
+        until = time.monotonic() + retry_after
+        if body.get("global") or resp.headers.get("X-RateLimit-Global"):
+            self._global_until = max(self._global_until, until)
+            scope = "global"
+        else:
+            bucket.remaining = 0
+            bucket.reset_at = max(bucket.reset_at, until)
+            scope = bucket.name or "webhook"
+        print(f"⏸️ Discord rate limit ({scope}): {retry_after:.2f}s bekleniyor")
+
 
 notifier = DiscordNotifier()
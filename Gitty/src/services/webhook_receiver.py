@@ -0,0 +1,362 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+from collections import deque
+
+from aiohttp import web
+from services.db_create import DB_PATH
+from services.db_writer import writer
+from services.outbox import enqueue_pipeline_transition
+from services.telemetry import RECEIVER_APPLY_SECONDS, RECEIVER_EVENTS
+
+# 0 = kapalı; açıkken polling sadece seyrek bir mutabakat taramasına düşer
+RECEIVER_PORT = int(os.getenv("GITTY_RECEIVER_PORT", "0"))
+RECEIVER_HOST = os.getenv("GITTY_RECEIVER_HOST", "0.0.0.0")
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+GITLAB_WEBHOOK_TOKEN = os.getenv("GITLAB_WEBHOOK_TOKEN", "")
+RECONCILE_INTERVAL = int(os.getenv("GITTY_RECONCILE_INTERVAL", "21600"))
+# GitHub push payload'ı en fazla 20 commit listeler; fazlası için repo yeniden sayılır
+GITHUB_PUSH_COMMIT_LIMIT = 20
+MAX_BODY = 25 * 1024 * 1024
+
+
+def verify_github(secret, body, signature):
+    """X-Hub-Signature-256: gövdenin secret ile HMAC-SHA256'sı"""
+    if not secret or not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_gitlab(token, header):
+    """X-Gitlab-Token: hook'ta tanımlı gizli token'ın aynısı"""
+    if not token or not header:
+        return False
+    return hmac.compare_digest(token, header)
+
+
+def _delta(platform, repo_name, **counts):
+    record = {
+        "platform": platform,
+        "repo_name": repo_name,
+        "commits": 0,
+        "open_issues": 0,
+        "closed_issues": 0,
+        "open_prs": 0,
+        "closed_prs": 0,
+    }
+    record.update(counts)
+    return record
+
+
+def _cursor_reset(platform, repo_name):
+    """Force push: eski "sha:sayı" imleci geçersiz, sonraki sayım baştan yapılır"""
+    return {"platform": platform, "repo_name": repo_name, "kind": "commits"}
+
+
+# action -> (açık farkı, kapalı farkı)
+GITHUB_STATE_DELTAS = {
+    "opened": (1, 0),
+    "reopened": (1, -1),
+    "closed": (-1, 1),
+}
+GITLAB_STATE_DELTAS = {
+    "open": (1, 0),
+    "reopen": (1, -1),
+    "close": (-1, 1),
+    "merge": (-1, 1),
+}
+
+
+def event_repo(platform, payload):
+    """Olayın ait olduğu repo adı (GitHub full_name, GitLab path_with_namespace)"""
+    if platform == "GitHub":
+        return (payload.get("repository") or {}).get("full_name")
+    return (payload.get("project") or {}).get("path_with_namespace")
+
+
+def parse_github_event(event, payload):
+    """
+    GitHub olayını DB değişikliklerine çevirir.
+    (writer kayıtları, yeniden sayılacak repo adları) döner.
+    """
+    repo = payload.get("repository") or {}
+    r_name = repo.get("full_name")
+    if not r_name:
+        return [], set()
+
+    # Her olay güncel yıldız/fork sayısını taşır (star ve fork dahil)
+    records = [
+        (
+            "repo_counts",
+            {
+                "platform": "GitHub",
+                "repo_name": r_name,
+                "stars": repo.get("stargazers_count", 0),
+                "forks": repo.get("forks_count", 0),
+            },
+        )
+    ]
+    resync = set()
+    action = payload.get("action")
+
+    if event == "push":
+        if payload.get("ref") != f"refs/heads/{repo.get('default_branch')}":
+            return records, resync
+        commits = payload.get("commits") or []
+        if payload.get("forced"):
+            resync.add(r_name)
+            records.append(("cursor_reset", _cursor_reset("GitHub", r_name)))
+        elif len(commits) >= GITHUB_PUSH_COMMIT_LIMIT:
+            resync.add(r_name)
+        else:
+            records.append(
+                ("stats_delta", _delta("GitHub", r_name, commits=len(commits)))
+            )
+
+    elif event == "issues":
+        if action == "deleted":
+            state = (payload.get("issue") or {}).get("state")
+            key = "open_issues" if state == "open" else "closed_issues"
+            records.append(("stats_delta", _delta("GitHub", r_name, **{key: -1})))
+        elif action == "transferred":
+            resync.add(r_name)
+        elif action in GITHUB_STATE_DELTAS:
+            opened, closed = GITHUB_STATE_DELTAS[action]
+            records.append(
+                (
+                    "stats_delta",
+                    _delta("GitHub", r_name, open_issues=opened, closed_issues=closed),
+                )
+            )
+
+    elif event == "pull_request" and action in GITHUB_STATE_DELTAS:
+        opened, closed = GITHUB_STATE_DELTAS[action]
+        records.append(
+            (
+                "stats_delta",
+                _delta("GitHub", r_name, open_prs=opened, closed_prs=closed),
+            )
+        )
+
+    return records, resync
+
+
+def parse_gitlab_event(event, payload):
+    """
+    GitLab olayını DB değişikliklerine çevirir.
+    (writer kayıtları, yeniden sayılacak repo adları, pipeline'lar) döner.
+    """
+    project = payload.get("project") or {}
+    r_name = project.get("path_with_namespace")
+    if not r_name:
+        return [], set(), []
+
+    records, resync, pipelines = [], set(), []
+    attrs = payload.get("object_attributes") or {}
+
+    if event == "Push Hook":
+        on_default = payload.get("ref") == f"refs/heads/{project.get('default_branch')}"
+        if on_default and payload.get("forced"):
+            # mark_forced_pushes: eski head yeni head'in atası değil
+            resync.add(r_name)
+            records.append(("cursor_reset", _cursor_reset("GitLab", r_name)))
+        elif on_default:
+            count = payload.get("total_commits_count") or 0
+            records.append(("stats_delta", _delta("GitLab", r_name, commits=count)))
+
+    elif event == "Issue Hook" and attrs.get("action") in GITLAB_STATE_DELTAS:
+        opened, closed = GITLAB_STATE_DELTAS[attrs["action"]]
+        records.append(
+            (
+                "stats_delta",
+                _delta("GitLab", r_name, open_issues=opened, closed_issues=closed),
+            )
+        )
+
+    elif event == "Merge Request Hook" and attrs.get("action") in GITLAB_STATE_DELTAS:
+        opened, closed = GITLAB_STATE_DELTAS[attrs["action"]]
+        records.append(
+            (
+                "stats_delta",
+                _delta("GitLab", r_name, open_prs=opened, closed_prs=closed),
+            )
+        )
+
+    elif event == "Pipeline Hook" and attrs.get("id"):
+        web_url = project.get("web_url")
+        pipelines.append(
+            {
+                "repo_name": r_name,
+                "pipeline_id": attrs["id"],
+                "status": attrs.get("status"),
+                "ref": attrs.get("ref"),
+                "created_at": attrs.get("created_at"),
+                "updated_at": attrs.get("finished_at") or attrs.get("created_at"),
+                "web_url": f"{web_url}/-/pipelines/{attrs['id']}" if web_url else None,
+            }
+        )
+
+    return records, resync, pipelines
+
+
+def apply_events(events):
+    """
+    Kuyruktaki olayları tek writer batch'inde uygular (thread'de çağrılır).
+    (pipeline durum geçişleri, yeniden sayılacak repo id'leri) döner.
+    """
+    with RECEIVER_APPLY_SECONDS.time():
+        return _apply_events(events)
+
+
+def _apply_events(events):
+    transitions, resync_names = [], set()
+    # Aynı batch'te birden çok kez değişen pipeline için son görülen durum
+    batch_status = {}
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        repo_ids = {
+            (platform, name): r_id
+            for r_id, platform, name in conn.execute(
+                "SELECT id, platform, repo_name FROM Repositories"
+            )
+        }
+        for platform, event, payload in events:
+            # Org/grup hook'ları takip edilmeyen repoları da gönderir: yok sayılır
+            if (platform, event_repo(platform, payload)) not in repo_ids:
+                continue
+            if platform == "GitHub":
+                records, resync = parse_github_event(event, payload)
+                pipelines = []
+            else:
+                records, resync, pipelines = parse_gitlab_event(event, payload)
+            for kind, record in records:
+                writer.submit(kind, record)
+            resync_names.update((platform, name) for name in resync)
+
+            for pipe in pipelines:
+                r_id = repo_ids.get(("GitLab", pipe["repo_name"]))
+                if r_id is None:
+                    continue
+                key = (r_id, pipe["pipeline_id"])
+                if key in batch_status:
+                    old_status = batch_status[key]
+                else:
+                    row = conn.execute(
+                        "SELECT status FROM Pipelines "
+                        "WHERE repo_id = ? AND pipeline_id = ?",
+                        key,
+                    ).fetchone()
+                    old_status = row[0] if row else None
+                if old_status == pipe["status"]:
+                    continue
+                batch_status[key] = pipe["status"]
+                transition = {
+                    "repo_id": r_id,
+                    "repo_name": pipe["repo_name"],
+                    "pipeline_id": pipe["pipeline_id"],
+                    "ref": pipe["ref"],
+                    "old_status": old_status,
+                    "new_status": pipe["status"],
+                    "web_url": pipe["web_url"],
+                }
+                enqueue_pipeline_transition({"repo_id": r_id, **pipe}, transition)
+                transitions.append(transition)
+    finally:
+        conn.close()
+
+    writer.flush()
+    resync_ids = {repo_ids[key] for key in resync_names if key in repo_ids}
+    return transitions, resync_ids
+
+
+class WebhookReceiver:
+    """
+    GitHub/GitLab webhook'larını dinleyen küçük aiohttp sunucusu.
+    İmzayı doğrular, olayı kuyruğa atar ve hemen 202 döner; olaylar
+    ana döngüde sırayla uygulanır, böylece sync ile aynı anda yazılmaz.
+    """
+
+    def __init__(self, host=RECEIVER_HOST, port=RECEIVER_PORT):
+        self.host = host
+        self.port = port
+        self.events = asyncio.Queue()
+        self._runner = None
+        # Yeniden gönderilen (redelivery) olaylar iki kez sayılmasın
+        self._seen = deque(maxlen=1000)
+
+    async def start(self):
+        app = web.Application(client_max_size=MAX_BODY)
+        app.router.add_post("/webhooks/github", self.handle_github)
+        app.router.add_post("/webhooks/gitlab", self.handle_gitlab)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"📡 Webhook alıcısı aktif: http://{self.host}:{self.port}/webhooks/")
+        if not GITHUB_WEBHOOK_SECRET:
+            print("  ⚠️ GITHUB_WEBHOOK_SECRET boş, GitHub olayları reddedilecek")
+        if not GITLAB_WEBHOOK_TOKEN:
+            print("  ⚠️ GITLAB_WEBHOOK_TOKEN boş, GitLab olayları reddedilecek")
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._runner = None
+
+    def _accept(self, platform, event, delivery, body):
+        if delivery and delivery in self._seen:
+            RECEIVER_EVENTS.inc(platform=platform, result="duplicate")
+            return web.Response(status=200, text="duplicate")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            RECEIVER_EVENTS.inc(platform=platform, result="invalid")
+            return web.Response(status=400, text="invalid json")
+        if delivery:
+            self._seen.append(delivery)
+        self.events.put_nowait((platform, event, payload))
+        RECEIVER_EVENTS.inc(platform=platform, result="accepted")
+        return web.Response(status=202, text="accepted")
+
+    async def handle_github(self, request):
+        body = await request.read()
+        if not verify_github(
+            GITHUB_WEBHOOK_SECRET, body, request.headers.get("X-Hub-Signature-256")
+        ):
+            RECEIVER_EVENTS.inc(platform="GitHub", result="unauthorized")
+            return web.Response(status=401, text="bad signature")
+        event = request.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            return web.Response(status=200, text="pong")
+        return self._accept(
+            "GitHub", event, request.headers.get("X-GitHub-Delivery"), body
+        )
+
+    async def handle_gitlab(self, request):
+        body = await request.read()
+        if not verify_gitlab(
+            GITLAB_WEBHOOK_TOKEN, request.headers.get("X-Gitlab-Token")
+        ):
+            RECEIVER_EVENTS.inc(platform="GitLab", result="unauthorized")
+            return web.Response(status=401, text="bad token")
+        return self._accept(
+            "GitLab",
+            request.headers.get("X-Gitlab-Event", ""),
+            request.headers.get("X-Gitlab-Event-UUID"),
+            body,
+        )
+
+    async def next_batch(self, timeout):
+        """İlk olayı en fazla timeout saniye bekler, sonra kuyruktakilerin hepsini alır"""
+        try:
+            first = await asyncio.wait_for(self.events.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while not self.events.empty():
+            batch.append(self.events.get_nowait())
+        return batch
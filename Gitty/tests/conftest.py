@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+# services modülleri DB yolunu import anında okur: testler geçici DB'ye yazar
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="gitty-test-")
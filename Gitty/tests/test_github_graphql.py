@@ -0,0 +1,66 @@
+import asyncio
+import sqlite3
+
+from aiohttp import web
+from fake_servers import FakeData, FakeGitHub
+from services import github_graphql
+from services.db_create import DB_PATH, create_database
+from services.db_writer import writer
+from services.github_sync import process_graphql_batch
+from services.http_client import HttpClient
+
+
+async def run_batch(data, batch):
+    runner = web.AppRunner(FakeGitHub(data).app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    github_graphql.GITHUB_GRAPHQL_URL = f"http://127.0.0.1:{port}/graphql"
+    try:
+        async with HttpClient() as http:
+            await process_graphql_batch(batch, http.bind({}))
+        await asyncio.to_thread(writer.flush)
+    finally:
+        await runner.cleanup()
+
+
+def test_graphql_batch_missing_and_renamed_repos():
+    create_database()
+    conn = sqlite3.connect(DB_PATH)
+    names = ("bench/repo0", "bench/repo9", "bench/old-name")
+    conn.executemany(
+        "INSERT INTO Repositories (platform, repo_name) VALUES ('GitHub', ?)",
+        [(name,) for name in names],
+    )
+    conn.commit()
+    ids = dict(conn.execute("SELECT repo_name, id FROM Repositories"))
+
+    # repo9 yok (null alias + NOT_FOUND), old-name artık repo2
+    data = FakeData(3)
+    data.renames["old-name"] = "repo2"
+    asyncio.run(run_batch(data, [(ids[name], name) for name in names]))
+
+    rows = dict(
+        conn.execute(
+            "SELECT repo_name, active FROM Repositories WHERE platform = 'GitHub'"
+        )
+    )
+    assert rows == {"bench/repo0": 1, "bench/repo9": 0, "bench/old-name": 1}
+
+    expected = data.stats(2)
+    stars, commits = conn.execute(
+        "SELECT r.star_count, s.total_commits FROM Repositories r "
+        "JOIN Repo_Stats s ON s.repo_id = r.id WHERE r.id = ?",
+        (ids["bench/old-name"],),
+    ).fetchone()
+    assert (stars, commits) == (expected["stars"], expected["commits"])
+
+    checked = {
+        repo_id
+        for (repo_id,) in conn.execute(
+            "SELECT repo_id FROM Poll_Schedule WHERE last_checked_at IS NOT NULL"
+        )
+    }
+    assert checked == set(ids.values())
+    conn.close()